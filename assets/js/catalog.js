@@ -0,0 +1,72 @@
+// Station and train search on the indexes prebuilt in catalog.json (`python catalog.py build`).
+// Mirrors StationIndex.positions and TrainIndex.search in catalog.py.
+
+const CATALOG_VERSION = 1;
+const GRAM_SIZE = 3;
+
+const catalogReady = fetch('catalog.json')
+    .then(response => response.json())
+    .then(catalog => {
+        if (catalog.version !== CATALOG_VERSION) {
+            console.warn(`catalog.json is version ${catalog.version}, expected ${CATALOG_VERSION}; run python catalog.py build`);
+        }
+        catalog.trains.numberKeys = Object.keys(catalog.trains.names).sort();
+        catalog.trains.tokenList = Object.keys(catalog.trains.tokens).sort();
+        return catalog;
+    });
+
+function normalizeName(name) {
+    return name.toLowerCase().normalize('NFKD').replace(/\p{M}/gu, '')
+        .replace(/[_-]/g, ' ').split(/\s+/).filter(Boolean).join(' ');
+}
+
+// Positions of the stations containing `query`, in catalog order.
+// `within` limits the search to earlier results, when the query only got longer.
+function searchStations(stations, query, within) {
+    query = normalizeName(query);
+    if (!query) {
+        return within ? within.slice() : stations.names.map((_, position) => position);
+    }
+    if (within) {
+        return within.filter(position => stations.keys[position].includes(query));
+    }
+    if (query.length <= GRAM_SIZE) {
+        return (stations.postings[query] || []).slice();
+    }
+    const grams = [];
+    for (let start = 0; start + GRAM_SIZE <= query.length; start++) {
+        grams.push(query.slice(start, start + GRAM_SIZE));
+    }
+    grams.sort((a, b) => (stations.postings[a] || []).length - (stations.postings[b] || []).length);
+    let candidates = stations.postings[grams[0]] || [];
+    for (const gram of grams.slice(1)) {
+        const postings = new Set(stations.postings[gram] || []);
+        candidates = candidates.filter(position => postings.has(position));
+        if (candidates.length === 0) {
+            return [];
+        }
+    }
+    return candidates.filter(position => stations.keys[position].includes(query));
+}
+
+// Train numbers (as strings) whose number starts with `query`, or whose name has
+// a word starting with every word of `query`, in ascending order.
+function searchTrains(trains, query) {
+    query = normalizeName(query);
+    if (!query) {
+        return [];
+    }
+    let numbers;
+    if (/^\d+$/.test(query)) {
+        numbers = trains.numberKeys.filter(number => number.startsWith(query));
+    } else {
+        numbers = null;
+        for (const word of query.split(' ')) {
+            const matching = new Set();
+            trains.tokenList.filter(token => token.startsWith(word))
+                .forEach(token => trains.tokens[token].forEach(number => matching.add(String(number))));
+            numbers = numbers ? numbers.filter(number => matching.has(number)) : [...matching];
+        }
+    }
+    return numbers.sort((a, b) => a - b);
+}
@@ -25,52 +25,110 @@ const dropdownOrigin = document.getElementById('dropdownList');
 const inputDestination = document.getElementById('destination_station');
 const dropdownDestination = document.getElementById('dropdownList2');
 
-let stations = [];
+let stations = { names: [], keys: [], postings: {} };
 
-fetch('station.json')
-    .then(response => response.json())
-    .then(data => {
-        stations = data.stations;
+catalogReady
+    .then(catalog => {
+        stations = catalog.stations;
     })
     .catch(error => console.error('Error loading JSON:', error));
 
+const STATION_ROW_HEIGHT = 36; // px; every row gets this height, so row positions follow from scrollTop
+const STATION_OVERSCAN = 4; // rows rendered above and below the visible ones
+const STATION_DEBOUNCE_MS = 80;
+
+// Only the rows in view exist in the DOM: two spacers stand in for the rest, the
+// row elements are reused while scrolling, and one delegated listener handles clicks.
 function setupStation(inputBox, dropdownList) {
+    const topSpacer = document.createElement('li');
+    const bottomSpacer = document.createElement('li');
+    const rows = [];
+    let results = [];       // Positions in stations.names matching the current query
+    let resultsFrom = null; // The stations index the results came from
+    let lastQuery = null;
+    let debounceTimer = null;
+    let renderQueued = false;
+
+    topSpacer.setAttribute('aria-hidden', 'true');
+    bottomSpacer.setAttribute('aria-hidden', 'true');
+    dropdownList.append(topSpacer, bottomSpacer);
+
+    function open(positions) {
+        results = positions;
+        resultsFrom = stations;
+        if (results.length === 0) {
+            dropdownList.style.display = 'none';
+            return;
+        }
+        dropdownList.style.display = 'block';
+        dropdownList.scrollTop = 0;
+        render();
+    }
+
+    function render() {
+        renderQueued = false;
+        const visible = Math.ceil((dropdownList.clientHeight || 200) / STATION_ROW_HEIGHT) + 2 * STATION_OVERSCAN;
+        const first = Math.max(0, Math.floor(dropdownList.scrollTop / STATION_ROW_HEIGHT) - STATION_OVERSCAN);
+        const last = Math.min(results.length, first + visible);
+        while (rows.length < last - first) {
+            const li = document.createElement('li');
+            li.classList.add('block', 'px-4', 'py-2', 'hover:bg-gray-100', 'dark:hover:bg-gray-600', 'dark:hover:text-white', 'cursor-pointer', 'truncate');
+            li.style.height = `${STATION_ROW_HEIGHT}px`;
+            dropdownList.insertBefore(li, bottomSpacer);
+            rows.push(li);
+        }
+        topSpacer.style.height = `${first * STATION_ROW_HEIGHT}px`;
+        bottomSpacer.style.height = `${(results.length - last) * STATION_ROW_HEIGHT}px`;
+        rows.forEach((li, offset) => {
+            const index = first + offset;
+            // Not `hidden`: the `block` class overrides it
+            li.style.display = index < last ? '' : 'none';
+            if (index < last && li.dataset.position !== String(results[index])) {
+                li.dataset.position = results[index];
+                li.textContent = stations.names[results[index]];
+            }
+        });
+    }
+
+    function filter() {
+        const query = normalizeName(inputBox.value);
+        if (!query) {
+            lastQuery = null;
+            dropdownList.style.display = 'none';
+            return;
+        }
+        // A longer query can only match a subset of the current results
+        const narrowed = lastQuery !== null && resultsFrom === stations && query.includes(lastQuery);
+        lastQuery = query;
+        open(searchStations(stations, query, narrowed ? results : undefined));
+    }
+
     inputBox.addEventListener('focus', function() {
         if (inputBox.value.length === 0 || inputBox.value === '') {
-            dropdownList.innerHTML = '';
-            show(stations);
+            lastQuery = null;
+            open(stations.names.map((_, position) => position));
         }
     })
     inputBox.addEventListener('input', function() {
-        const query = inputBox.value.toLowerCase();
-        dropdownList.innerHTML = '';
+        clearTimeout(debounceTimer);
+        debounceTimer = setTimeout(filter, STATION_DEBOUNCE_MS);
+    });
 
-        if (query) {
-            const filteredStations = stations.filter(station => station.toLowerCase().includes(query));
-            if (filteredStations.length > 0) {
-                show(filteredStations);
-            } else {
-                dropdownList.style.display = 'none';
-            }
-        } else {
+    dropdownList.addEventListener('scroll', function() {
+        if (!renderQueued) {
+            renderQueued = true;
+            requestAnimationFrame(render);
+        }
+    }, { passive: true });
+
+    dropdownList.addEventListener('click', function(event) {
+        const li = event.target.closest('li[data-position]');
+        if (li) {
+            inputBox.value = stations.names[li.dataset.position];
             dropdownList.style.display = 'none';
         }
     });
 
-    function show(filteredStations) {
-        dropdownList.style.display = 'block';
-        filteredStations.forEach(station => {
-            const li = document.createElement('li');
-            li.classList.add('block', 'px-4', 'py-2', 'hover:bg-gray-100', 'dark:hover:bg-gray-600', 'dark:hover:text-white');
-            li.textContent = station;
-            li.addEventListener('click', function() {
-                inputBox.value = station;
-                dropdownList.style.display = 'none';
-            });
-            dropdownList.appendChild(li);
-        });
-    }
-
 
     document.addEventListener('click', function(event) {
         if (!inputBox.contains(event.target) && !dropdownList.contains(event.target)) {
@@ -83,19 +141,18 @@ setupStation(inputOrigin, dropdownOrigin);
 setupStation(inputDestination, dropdownDestination);
 
 function setupTrain(inputBox, dropdownList) {
-    let trains = {};
+    let trains = { names: {}, numberKeys: [], tokenList: [], tokens: {} };
 
-    fetch('train.json')
-        .then(response => response.json())
-        .then(data => {
-            trains = data; // Store the fetched data in the trains object
+    catalogReady
+        .then(catalog => {
+            trains = catalog.trains; // Store the train index from catalog.json
         })
         .catch(error => console.error('Error loading train data:', error));
 
     inputBox.addEventListener('focus', function() {
         if (inputBox.value.length === 0 || inputBox.value === '') {
             dropdownList.innerHTML = '';
-            show(Object.entries(trains));
+            show(Object.entries(trains.names));
         }
     })
     inputBox.addEventListener('input', function() {
@@ -103,9 +160,7 @@ function setupTrain(inputBox, dropdownList) {
         dropdownList.innerHTML = '';
 
         if (query) {
-            const filteredTrains = Object.entries(trains).filter(([code, name]) =>
-                name.toLowerCase().includes(query) || code.includes(query)
-            );
+            const filteredTrains = searchTrains(trains, query).map(code => [code, trains.names[code]]);
 
             if (filteredTrains.length > 0) {
                 show(filteredTrains);
@@ -0,0 +1,85 @@
+"""
+Benchmark for decoding seat-layout responses.
+
+Compares the current path (stdlib json.loads into dicts) with orjson and the
+typed msgspec decoder in payloads.py, for decoding alone and for decoding
+plus building the SeatIndex that seat selection runs on. Backends that are
+not installed are skipped.
+
+    python bench_decoding.py
+    python bench_decoding.py --payload seat_layout.json   # a recorded response body
+"""
+import argparse, gc, json, sys, time, tracemalloc
+from colorama import Fore, init
+
+import payloads
+from bench_seat_selection import make_seat_layout, percentile
+from seat_selection import SeatIndex
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def decoders():
+    """Map each decoding path to a callable taking a response body and returning the coaches."""
+    paths = {"json (current)": lambda text: json.loads(text)["data"]["seatLayout"]}
+    if orjson is not None:
+        paths["orjson"] = lambda text: orjson.loads(text)["data"]["seatLayout"]
+    if payloads.msgspec is not None:
+        paths["msgspec typed"] = payloads.decode_seat_layout
+    return paths
+
+
+def measure(func, text, runs):
+    """
+    Time `runs` calls of func(text) and trace one more for memory.
+
+    Returns:
+        dict: p50/p99 latency in milliseconds and peak traced memory in KiB.
+    """
+    func(text)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(text)
+        samples.append((time.perf_counter() - start) * 1000)
+    gc.collect()
+    tracemalloc.start()
+    result = func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"p50": percentile(samples, 50), "p99": percentile(samples, 99), "peak_kib": peak / 1024}
+
+
+def main(argv=None):
+    init(autoreset=True)
+    parser = argparse.ArgumentParser(description="Benchmark JSON decoding of seat-layout responses.")
+    parser.add_argument("--payload", action="append", default=[], help="recorded seat-layout response body (repeatable)")
+    parser.add_argument("--runs", type=int, default=200, help="timed calls per path")
+    args = parser.parse_args(argv)
+
+    if args.payload:
+        bodies = []
+        for path in args.payload:
+            with open(path, encoding="utf-8") as file:
+                bodies.append((path, file.read()))
+    else:
+        bodies = [(f"synthetic {coaches} coaches x 20 rows", json.dumps({"data": {"seatLayout": make_seat_layout(coaches, 20)}}))
+                  for coaches in (4, 15, 30)]
+
+    print(f"{Fore.CYAN}fast backend: {payloads.BACKEND}")
+    for name, text in bodies:
+        print(f"\n{Fore.CYAN}{name} ({len(text) / 1024:.0f} KiB)")
+        print(f"{'path':<32}{'p50 ms':>9}{'p99 ms':>9}{'peak KiB':>10}")
+        for path, decode in decoders().items():
+            for label, func in ((path, decode), (f"{path} + index", lambda text, decode=decode: SeatIndex(decode(text)))):
+                result = measure(func, text, args.runs)
+                print(f"{label:<32}{result['p50']:>9.3f}{result['p99']:>9.3f}{result['peak_kib']:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Offline benchmark for the seat-selection strategies.
+
+Generates synthetic `seatLayout` payloads shaped like the seat-layout API
+response and reports per-strategy latency percentiles and memory use for
+the indexed engine in seat_selection.py and the legacy pickers in
+scriptwithcomment.py.
+
+    python bench_seat_selection.py
+    python bench_seat_selection.py --coaches 15 --rows 20 --occupancy 0.7 --desired KA-10,KA-11
+    python bench_seat_selection.py --budget-ms 1.0   # exit 1 if any engine p99 exceeds 1 ms
+"""
+import argparse, ast, gc, random, sys, time, tracemalloc
+from colorama import Fore, init
+
+from seat_selection import SeatIndex, SeatMap, IncrementalSelector, select_seats
+
+
+COACH_NAMES = ["KA", "KHA", "GA", "GHA", "UMA", "CHA", "SCHA", "JA", "JHA", "NEO", "TA", "THA", "DA", "DHA", "TO", "THO", "DO", "DHO"]
+LEGACY_PICKERS = ["find_selected_seats", "find_nearby_seats", "select_nearby_seats", "find_remaining_seats", "find_seat_blocks", "select_block_seats"]
+
+
+def make_seat_layout(coaches=15, rows=20, seats_per_row=4, occupancy=0.6, seed=0):
+    """
+    Build a synthetic `seatLayout` payload.
+
+    Args:
+        coaches (int): Number of coaches.
+        rows (int): Rows per coach.
+        seats_per_row (int): Seats per row.
+        occupancy (float): Fraction of seats already sold (0.0 - 1.0).
+        seed (int): Random seed, so runs are repeatable.
+
+    Returns:
+        list: Coaches in the same shape as `data.seatLayout` from the API.
+    """
+    rng = random.Random(seed)
+    ticket_id = 50_000_000
+    seat_layout = []
+    for c in range(coaches):
+        name = COACH_NAMES[c % len(COACH_NAMES)] + ("" if c < len(COACH_NAMES) else str(c))
+        layout = []
+        number = 1
+        for _ in range(rows):
+            row = []
+            for _ in range(seats_per_row):
+                ticket_id += 1
+                row.append({
+                    "ticket_id": ticket_id,
+                    "seat_number": f"{name}-{number}",
+                    "seat_availability": 0 if rng.random() < occupancy else 1,
+                    "ticket_type": 1,
+                    "seat_type": "S_CHAIR",
+                })
+                number += 1
+            layout.append(row)
+        seat_layout.append({"floor_name": name, "floor_number": c + 1, "layout": layout})
+    return seat_layout
+
+
+def load_legacy_pickers(path="scriptwithcomment.py"):
+    """
+    Load the seat pickers from scriptwithcomment.py without running the script.
+
+    The script signs in and starts booking at import time, so only the picker
+    function definitions are compiled out of its source.
+    """
+    with open(path, encoding="utf-8") as file:
+        tree = ast.parse(file.read(), filename=path)
+    tree.body = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in LEGACY_PICKERS]
+    namespace = {"Fore": Fore}
+    exec(compile(tree, path, "exec"), namespace)
+    return namespace
+
+
+def strategies(legacy):
+    """
+    Map each strategy name to a callable taking (seat_layout, desired_seats, max_seat).
+
+    engine.seat_map is the compact per-coach arrays the other engine strategies
+    start from; engine.repoll feeds the same layout to an IncrementalSelector
+    again, i.e. the cost of a re-poll in which no seat changed.
+    """
+    return {
+        "engine.seat_map": lambda layout, desired, k: SeatMap.from_layout(layout),
+        "engine.index": lambda layout, desired, k: SeatIndex(layout),
+        "engine.select": select_seats,
+        "engine.repoll": IncrementalSelector().select,
+        "legacy.find_selected_seats": lambda layout, desired, k: legacy["find_selected_seats"](layout, desired, k),
+        "legacy.find_nearby_seats": lambda layout, desired, k: legacy["find_nearby_seats"](layout, desired, k),
+        "legacy.find_seat_blocks": lambda layout, desired, k: legacy["find_seat_blocks"](layout, k),
+        "legacy.select_block_seats": lambda layout, desired, k: legacy["select_block_seats"](legacy["find_seat_blocks"](layout, k), k),
+    }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(func, seat_layout, desired_seats, max_seat, runs):
+    """
+    Time `runs` calls and trace one more for allocations.
+
+    Returns:
+        dict: p50/p90/p99/max latency in milliseconds, memory blocks still held
+              by the call's result, and peak traced memory in KiB, or an error message.
+    """
+    try:
+        func(seat_layout, desired_seats, max_seat)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(seat_layout, desired_seats, max_seat)
+        samples.append((time.perf_counter() - start) * 1000)
+    gc.collect()
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    result = func(seat_layout, desired_seats, max_seat)
+    blocks = sys.getallocatedblocks() - blocks
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        "p50": percentile(samples, 50),
+        "p90": percentile(samples, 90),
+        "p99": percentile(samples, 99),
+        "max": max(samples),
+        "blocks": blocks,
+        "peak_kib": peak / 1024,
+    }
+
+
+def default_scenarios():
+    """15-coach intercity layouts at several occupancies, with and without desired seats."""
+    scenarios = []
+    for occupancy in (0.3, 0.7, 0.95):
+        for desired in ([], ["KA-10", "KA-11", "KHA-40", "CHA-5"]):
+            scenarios.append({"coaches": 15, "rows": 20, "occupancy": occupancy, "desired_seats": desired, "seat": 4})
+    scenarios.append({"coaches": 4, "rows": 10, "occupancy": 0.5, "desired_seats": [], "seat": 1})
+    return scenarios
+
+
+def main(argv=None):
+    init(autoreset=True)
+    parser = argparse.ArgumentParser(description="Benchmark seat-selection strategies on synthetic layouts.")
+    parser.add_argument("--coaches", type=int, help="coaches per layout (default: built-in scenario matrix)")
+    parser.add_argument("--rows", type=int, default=20, help="rows per coach")
+    parser.add_argument("--occupancy", type=float, default=0.6, help="fraction of seats already sold")
+    parser.add_argument("--desired", default="", help="comma separated desired seats, e.g. KA-10,KA-11")
+    parser.add_argument("--seat", type=int, default=4, help="number of seats to select")
+    parser.add_argument("--runs", type=int, default=300, help="timed calls per strategy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget-ms", type=float, help="fail if any engine strategy's p99 exceeds this")
+    args = parser.parse_args(argv)
+
+    if args.coaches:
+        scenarios = [{"coaches": args.coaches, "rows": args.rows, "occupancy": args.occupancy,
+                      "desired_seats": [s for s in args.desired.split(",") if s], "seat": args.seat}]
+    else:
+        scenarios = default_scenarios()
+
+    pickers = strategies(load_legacy_pickers())
+    over_budget = []
+    for scenario in scenarios:
+        seat_layout = make_seat_layout(scenario["coaches"], scenario["rows"], occupancy=scenario["occupancy"], seed=args.seed)
+        desired = scenario["desired_seats"]
+        print(f"\n{Fore.CYAN}{scenario['coaches']} coaches x {scenario['rows']} rows, occupancy {scenario['occupancy']:.0%}, "
+              f"seat={scenario['seat']}, desired={','.join(desired) or '-'}")
+        print(f"{'strategy':<30}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'blocks':>9}{'peak KiB':>10}")
+        for name, func in pickers.items():
+            result = measure(func, seat_layout, desired, scenario["seat"], args.runs)
+            if "error" in result:
+                print(f"{name:<30}{Fore.RED}{result['error']}")
+                continue
+            print(f"{name:<30}{result['p50']:>9.3f}{result['p90']:>9.3f}{result['p99']:>9.3f}{result['max']:>9.3f}"
+                  f"{result['blocks']:>9}{result['peak_kib']:>10.1f}")
+            if args.budget_ms is not None and name.startswith("engine.") and result["p99"] > args.budget_ms:
+                over_budget.append((name, scenario, result["p99"]))
+
+    if over_budget:
+        for name, scenario, p99 in over_budget:
+            print(f"{Fore.RED}{name} p99 {p99:.3f} ms exceeds budget {args.budget_ms} ms "
+                  f"({scenario['coaches']} coaches, occupancy {scenario['occupancy']:.0%})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Loading and validation of the booking configuration.
+
+The configuration can come from the environment (.env), from a file or from
+the dict returned by fetch_data_gui.py. Either way it is checked against
+station.json and train.json before anything is sent, so a typo in a station
+name is corrected (or, if ambiguous, reported with suggestions) and an
+unknown train number stops the run at startup instead of making the booking
+loop retry a search that can never succeed.
+
+    BOOKING_CONFIG=booking.json python script.py    # or booking.env; default: the environment
+    BOOKING_CONFIG=gui python script.py             # fill in the fetch_data_gui.py form
+"""
+import os, json
+from datetime import date, datetime
+from dotenv import dotenv_values
+
+from catalog import load_catalog
+from payment import resolve_payment_method
+
+
+SEAT_CLASSES = ("AC_B", "AC_S", "SNIGDHA", "F_BERTH", "F_SEAT", "F_CHAIR", "S_CHAIR", "SHOVAN", "SHULOV", "AC_CHAIR")
+MAX_SEATS_PER_BOOKING = 4
+DATE_FORMATS = ("%d-%b-%Y", "%Y-%m-%d")
+
+# Config key -> environment variable it is read from.
+ENV_NAMES = {
+    "mobile_number": "num",
+    "password": "passcode",
+    "from_station": "from_station",
+    "to_station": "to_station",
+    "journey_date": "journey_date",
+    "seat_class": "seat_class",
+    "train_number": "train_number",
+    "seat": "seat",
+    "desired_seats": "desired_seats",
+    "passenger_names": "passenger_names",
+    "payment_method": "payment_method",
+    "start_at": "start_at",
+}
+REQUIRED = ("mobile_number", "password", "from_station", "to_station", "journey_date", "seat_class", "train_number", "seat")
+
+
+class ConfigError(ValueError):
+    """The configuration has one or more invalid values; `problems` lists them all."""
+
+    def __init__(self, problems):
+        super().__init__("\n".join(problems))
+        self.problems = problems
+
+
+def read_source(source=None):
+    """
+    Raw config values from `source`.
+
+    Args:
+        source: None for the environment, "gui" to fill in the fetch_data_gui.py
+            form, a path to a .json or .env-style file, or a dict such as the one
+            the form returns.
+
+    Returns:
+        dict: Config key -> raw value (None when not given).
+
+    Raises:
+        ConfigError: If the file does not exist or is not a JSON object, or the form
+            was closed without submitting.
+    """
+    if source is None:
+        values = os.environ
+    elif isinstance(source, dict):
+        values = source
+    elif source == "gui":
+        try:
+            from tkinter import TclError
+            from fetch_data_gui import fetchDataUsingGui
+        except ImportError as e:
+            raise ConfigError([f"BOOKING_CONFIG=gui needs tkinter and tkcalendar ({e})."]) from e
+        try:
+            values = fetchDataUsingGui()
+        except TclError as e:
+            raise ConfigError([f"BOOKING_CONFIG=gui: could not open the form ({e})."]) from e
+        if not values:
+            raise ConfigError(["BOOKING_CONFIG=gui: the form was closed without submitting."])
+    elif not os.path.isfile(source):
+        raise ConfigError([f"BOOKING_CONFIG: file '{source}' not found."])
+    elif source.endswith(".json"):
+        try:
+            with open(source, encoding="utf-8") as file:
+                values = json.load(file)
+        except ValueError as e:
+            raise ConfigError([f"BOOKING_CONFIG: '{source}' is not valid JSON ({e})."]) from e
+        if not isinstance(values, dict):
+            raise ConfigError([f"BOOKING_CONFIG: '{source}' must hold a JSON object of config values."])
+    else:
+        values = dotenv_values(source)
+    return {key: values.get(key, values.get(env_name)) for key, env_name in ENV_NAMES.items()}
+
+
+def _split(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    return [item.strip() for item in value or [] if str(item).strip()]
+
+
+def _parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+    return None
+
+
+def load_config(source=None, catalogs=None, today=None):
+    """
+    Read, convert and validate the booking configuration.
+
+    Args:
+        source: See read_source.
+        catalogs (tuple): (StationIndex, TrainIndex) as returned by catalog.load_catalog; loaded if omitted.
+        today (date): Reference date for rejecting past journeys (defaults to today).
+
+    Returns:
+        dict: The booking info script.py runs on, with `train_number` and `seat` as ints,
+            `desired_seats` and `passenger_names` as lists, station names spelled as in
+            station.json and `journey_date` as DD-Mon-YYYY. Misspelled stations that match
+            one station clearly are corrected, with a note in `corrections`.
+
+    Raises:
+        ConfigError: If any value is missing or invalid.
+    """
+    raw = read_source(source)
+    stations, trains = catalogs or load_catalog()
+    config = {key: value.strip() if isinstance(value, str) else value for key, value in raw.items()}
+    problems = [f"{ENV_NAMES[key]} is required." for key in REQUIRED if config[key] in (None, "")]
+
+    config["corrections"] = []
+    for key in ("from_station", "to_station"):
+        if config[key]:
+            name, candidates = stations.resolve(config[key])
+            if name is None:
+                hint = f" Did you mean {' / '.join(candidate for candidate, _ in candidates[:3])}?" if candidates else ""
+                problems.append(f"{ENV_NAMES[key]}: unknown station '{config[key]}'.{hint}")
+            elif stations.canonical(config[key]) is None:
+                config["corrections"].append(f"{ENV_NAMES[key]}: using '{name}' for '{config[key]}'.")
+            config[key] = name or config[key]
+    if config["from_station"] and config["from_station"] == config["to_station"]:
+        problems.append("from_station and to_station are the same station.")
+
+    if config["journey_date"]:
+        journey_date = _parse_date(config["journey_date"])
+        if journey_date is None:
+            problems.append(f"journey_date: '{config['journey_date']}' is not a date like 20-Oct-2026.")
+        elif journey_date < (today or date.today()):
+            problems.append(f"journey_date: {config['journey_date']} is in the past.")
+        else:
+            config["journey_date"] = journey_date.strftime("%d-%b-%Y")
+
+    if config["seat_class"] and config["seat_class"] not in SEAT_CLASSES:
+        problems.append(f"seat_class: '{config['seat_class']}' is not one of {', '.join(SEAT_CLASSES)}.")
+
+    if config["train_number"] not in (None, ""):
+        number = trains.resolve(config["train_number"])
+        if number is None:
+            matches = [] if str(config["train_number"]).isdigit() else trains.search(str(config["train_number"]))
+            problems.append(f"train_number: '{config['train_number']}' matches several trains: "
+                            f"{', '.join(map(trains.label, matches))}." if len(matches) > 1 else
+                            f"train_number: no train {config['train_number']} in train.json.")
+        config["train_number"] = number or config["train_number"]
+
+    if config["seat"] not in (None, ""):
+        try:
+            config["seat"] = int(config["seat"])
+        except ValueError:
+            config["seat"] = None
+        if config["seat"] is None or not 1 <= config["seat"] <= MAX_SEATS_PER_BOOKING:
+            problems.append(f"seat must be a number from 1 to {MAX_SEATS_PER_BOOKING}.")
+
+    config["desired_seats"] = _split(config["desired_seats"])
+    config["passenger_names"] = _split(config["passenger_names"])
+
+    if config["payment_method"] and not resolve_payment_method(config["payment_method"]):
+        problems.append(f"payment_method: unknown method '{config['payment_method']}'.")
+
+    if config["start_at"]:
+        try:
+            datetime.strptime(config["start_at"], "%H:%M:%S" if config["start_at"].count(":") == 2 else "%H:%M")
+        except ValueError:
+            problems.append(f"start_at: '{config['start_at']}' is not a time like 07:59 or 07:59:30.")
+
+    if problems:
+        raise ConfigError(problems)
+    return config
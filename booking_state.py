@@ -0,0 +1,79 @@
+from enum import IntEnum
+
+
+class Stage(IntEnum):
+    NEW = 0
+    AUTHENTICATED = 1
+    TRIP_RESOLVED = 2
+    LAYOUT_FETCHED = 3
+    SEATS_RESERVED = 4
+    DETAILS_SENT = 5
+    OTP_VERIFIED = 6
+    CONFIRMED = 7
+
+
+# What each stage produces; rewinding to before a stage forgets these.
+STAGE_FIELDS = {
+    Stage.TRIP_RESOLVED: ("trip", "confirm_template"),
+    Stage.LAYOUT_FETCHED: ("seat_layout",),
+    Stage.SEATS_RESERVED: ("ticket_ids",),
+    Stage.DETAILS_SENT: ("passenger_names", "confirm_payload"),
+    Stage.OTP_VERIFIED: ("otp",),
+}
+
+
+class BookingState:
+    """
+    How far a booking attempt got, and what each finished stage produced.
+
+    main() skips every stage that is already done, so a retry resumes at the
+    stage that failed instead of searching the trip and polling the layout
+    again. A failure that makes earlier results stale (a trip the server no
+    longer knows, seats lost after the layout was read) rewinds to the last
+    stage that is still valid. The payment method does not depend on any
+    stage and survives rewinds.
+
+    `peak` is the furthest stage any attempt reached, and `backoff` tells the
+    retry loop whether the last failure should be waited out (the server asked
+    to try later, or a step failed outright) or retried at once (a seat race).
+    """
+
+    def __init__(self):
+        self.stage = Stage.NEW
+        self.peak = Stage.NEW
+        self.backoff = False
+        self.payment_method = None
+        for fields in STAGE_FIELDS.values():
+            for field in fields:
+                setattr(self, field, None)
+
+    def reached(self, stage):
+        return self.stage >= stage
+
+    def advance(self, stage, **results):
+        """Mark `stage` as done and store what it produced."""
+        for field, value in results.items():
+            setattr(self, field, value)
+        self.stage = max(self.stage, stage)
+        self.peak = max(self.peak, stage)
+
+    def rewind(self, stage):
+        """Go back to `stage`, forgetting everything produced by later stages."""
+        if stage >= self.stage:
+            return
+        for later, fields in STAGE_FIELDS.items():
+            if later > stage:
+                for field in fields:
+                    setattr(self, field, None)
+        self.stage = stage
+
+    def fail(self, stage, backoff=True):
+        """
+        End a failed attempt: rewind to `stage` and note whether to back off before the next one.
+
+        Returns:
+            bool: False, for main() to return.
+        """
+        self.rewind(stage)
+        self.backoff = backoff
+        return False
@@ -0,0 +1,167 @@
+import os, re, json, time, hashlib
+import jwt
+
+
+CACHE_DIR = os.getenv("SHOHOZ_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "shohoz-ticket"))
+
+
+def server_cache_dir(api_base):
+    """
+    Cache directory for one API server.
+
+    Tokens and trip IDs are only valid on the server that issued them, so runs
+    against mock_server.py or a replay must not share entries with real runs.
+    """
+    return os.path.join(CACHE_DIR, re.sub(r"[^A-Za-z0-9.-]+", "_", api_base).strip("_"))
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path, data):
+    """Write `data` atomically, readable by the current user only."""
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(tmp_path, path)
+
+
+def _key(value):
+    """Cache key for a mobile number, so the number itself is not stored."""
+    return hashlib.sha256(str(value).encode()).hexdigest()[:32]
+
+
+def token_expiry(token, default_ttl=3600):
+    """
+    Read the expiry time of a JWT without verifying its signature.
+
+    Args:
+        token (str): The auth token.
+        default_ttl (int): Lifetime assumed when the token has no `exp` claim.
+
+    Returns:
+        float: Expiry as a Unix timestamp, or None if the token cannot be decoded.
+    """
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError:
+        return None
+    return float(claims.get("exp") or time.time() + default_ttl)
+
+
+class TokenCache:
+    """
+    Auth tokens persisted to disk per mobile number, aware of JWT expiry.
+
+    Args:
+        api_base (str): The API server the tokens were issued by.
+        path (str): Cache file location (created with 0600 permissions); defaults
+            to tokens.json in the server's cache directory.
+        refresh_margin (int): Seconds before expiry at which a token counts as
+            due for refresh and is no longer handed out at startup.
+    """
+
+    def __init__(self, api_base, path=None, refresh_margin=600):
+        self.path = path or os.path.join(server_cache_dir(api_base), "tokens.json")
+        self.refresh_margin = refresh_margin
+
+    def get(self, mobile_number):
+        """Return a cached token that is not close to expiry, otherwise None."""
+        entry = _read_json(self.path).get(_key(mobile_number))
+        if entry and entry.get("expires_at", 0) - self.refresh_margin > time.time():
+            return entry["token"]
+        return None
+
+    def put(self, mobile_number, token):
+        expires_at = token_expiry(token)
+        if expires_at is None:
+            return
+        data = _read_json(self.path)
+        data[_key(mobile_number)] = {"token": token, "expires_at": expires_at}
+        _write_json(self.path, data)
+
+    def invalidate(self, mobile_number):
+        data = _read_json(self.path)
+        if data.pop(_key(mobile_number), None) is not None:
+            _write_json(self.path, data)
+
+    def refresh_at(self, token):
+        """
+        Unix time at which `token` should be replaced: `refresh_margin` before
+        expiry, but no earlier than halfway through a short-lived token's lifetime.
+        """
+        expires_at = token_expiry(token)
+        if expires_at is None:
+            return time.time()
+        try:
+            issued_at = float(jwt.decode(token, options={"verify_signature": False}).get("iat") or time.time())
+        except (jwt.PyJWTError, TypeError, ValueError):
+            issued_at = time.time()
+        return expires_at - min(self.refresh_margin, max(0, expires_at - issued_at) / 2)
+
+
+class TripCache:
+    """
+    Trip IDs from search-trips-v2, persisted per journey.
+
+    A journey is (from_station, to_station, journey_date, seat_class,
+    train_number); its trip_id, trip_route_id and boarding point do not change,
+    so retries and restarts can go straight to the seat layout. Entries are
+    dropped once the journey date has passed or after `max_age` seconds.
+
+    Args:
+        api_base (str): The API server the trip IDs come from.
+        path (str): Cache file location (created with 0600 permissions); defaults
+            to trips.json in the server's cache directory.
+        max_age (int): Seconds after which an entry is looked up again.
+    """
+
+    def __init__(self, api_base, path=None, max_age=2 * 24 * 3600):
+        self.path = path or os.path.join(server_cache_dir(api_base), "trips.json")
+        self.max_age = max_age
+
+    @staticmethod
+    def _journey_key(journey):
+        return "|".join(str(part) for part in journey)
+
+    def _expired(self, journey, entry):
+        if entry.get("cached_at", 0) + self.max_age < time.time():
+            return True
+        try:
+            journey_day = time.mktime(time.strptime(str(journey[2]), "%d-%b-%Y"))
+        except (IndexError, ValueError, OverflowError):
+            return False
+        return journey_day + 24 * 3600 < time.time()
+
+    def get(self, journey):
+        """Return (trip_id, route_id, boarding_id, train_name) for `journey`, or None."""
+        entry = _read_json(self.path).get(self._journey_key(journey))
+        if not entry or self._expired(journey, entry):
+            return None
+        trip = entry.get("trip_id"), entry.get("route_id"), entry.get("boarding_id"), entry.get("train_name")
+        return trip if all(trip[:3]) else None
+
+    def put(self, journey, trip_id, route_id, boarding_id, train_name):
+        if not all([trip_id, route_id, boarding_id]):
+            return
+        data = {key: entry for key, entry in _read_json(self.path).items() if not self._expired(key.split("|"), entry)}
+        data[self._journey_key(journey)] = {
+            "trip_id": trip_id,
+            "route_id": route_id,
+            "boarding_id": boarding_id,
+            "train_name": train_name,
+            "cached_at": time.time(),
+        }
+        _write_json(self.path, data)
+
+    def invalidate(self, journey):
+        data = _read_json(self.path)
+        if data.pop(self._journey_key(journey), None) is not None:
+            _write_json(self.path, data)
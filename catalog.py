@@ -0,0 +1,396 @@
+"""
+Search indexes over the station and train catalogs.
+
+StationIndex answers "which stations contain this text" without scanning and
+lowercasing every name per keystroke: names are normalized once, and every
+substring of up to GRAM_SIZE characters maps to the sorted positions of the
+names that contain it. A query of GRAM_SIZE characters or fewer is a single
+lookup; a longer one intersects the postings of its grams and checks the few
+names left. When the user keeps typing, the next query can be matched
+against the previous results alone.
+
+For misspelled names StationIndex also keeps the trigrams of every name
+padded with spaces ("  dh", " dha", ..., "ka "); suggest() ranks the names
+sharing the most trigrams with the query (Jaccard similarity), and resolve()
+picks a single correction only when one candidate clearly wins.
+
+TrainIndex looks trains up by number or by the start of any word of their
+name, and knows which trains run the same route in the other direction.
+
+Both indexes are built once into catalog.json, next to the raw catalogs:
+
+    python catalog.py build
+
+load_catalog() reads that artifact instead of re-indexing station.json and
+train.json, and rebuilds it when either source has changed since. The web UI
+fetches the same file.
+"""
+import argparse, bisect, hashlib, json, os, sys, unicodedata
+from colorama import Fore, init
+
+
+CATALOG_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_FILE = "catalog.json"
+CATALOG_VERSION = 1  # Bump when the artifact layout or normalize() changes
+SOURCES = ("station.json", "train.json")
+GRAM_SIZE = 3
+RESOLVE_CUTOFF = 0.3  # Minimum similarity for resolve() to accept a correction
+RESOLVE_MARGIN = 0.1  # How far the best candidate must lead the next one
+
+
+def trigrams(key):
+    """Trigrams of a normalized name, padded so the first and last letters weigh like the rest."""
+    padded = f"  {key} "
+    return {padded[start:start + 3] for start in range(len(padded) - 2)}
+
+
+def normalize(name):
+    """Lowercase `name`, drop accents and treat '_', '-' and runs of spaces as one space."""
+    name = unicodedata.normalize("NFKD", name.casefold())
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    return " ".join(name.replace("_", " ").replace("-", " ").split())
+
+
+class StationIndex:
+    """
+    Substring index over station names.
+
+    Args:
+        names (list): Station names, in the order results should be listed.
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.keys = [normalize(name) for name in self.names]
+        self.by_key = dict(zip(self.keys, self.names))
+        postings = {}
+        for position, key in enumerate(self.keys):
+            grams = {key[start:start + size]
+                     for size in range(1, GRAM_SIZE + 1)
+                     for start in range(len(key) - size + 1)}
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self.postings = {gram: tuple(positions) for gram, positions in postings.items()}
+        self.gram_counts = []
+        fuzzy = {}
+        for position, key in enumerate(self.keys):
+            grams = trigrams(key)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                fuzzy.setdefault(gram, []).append(position)
+        self.fuzzy = {gram: tuple(positions) for gram, positions in fuzzy.items()}
+
+    def to_artifact(self):
+        return {"names": self.names, "keys": self.keys, "postings": self.postings,
+                "trigrams": self.fuzzy, "gram_counts": self.gram_counts}
+
+    @classmethod
+    def from_artifact(cls, data):
+        """Rebuild the index from to_artifact() output without re-indexing the names."""
+        index = cls.__new__(cls)
+        index.names, index.keys = data["names"], data["keys"]
+        index.by_key = dict(zip(index.keys, index.names))
+        index.postings, index.fuzzy, index.gram_counts = data["postings"], data["trigrams"], data["gram_counts"]
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def positions(self, query, within=None):
+        """
+        Positions of the names containing `query`, in catalog order.
+
+        Args:
+            query (str): Text typed by the user; normalized like the names.
+            within (sequence): Positions to search instead of the whole catalog,
+                e.g. the results for a shorter prefix of the same query.
+
+        Returns:
+            list: Positions into `names`; every position when the query is empty.
+        """
+        query = normalize(query)
+        if not query:
+            return list(range(len(self.names))) if within is None else list(within)
+        if within is not None:
+            keys = self.keys
+            return [position for position in within if query in keys[position]]
+        if len(query) <= GRAM_SIZE:
+            return list(self.postings.get(query, ()))
+        grams = sorted({query[start:start + GRAM_SIZE] for start in range(len(query) - GRAM_SIZE + 1)},
+                       key=lambda gram: len(self.postings.get(gram, ())))
+        candidates = set(self.postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            candidates.intersection_update(self.postings.get(gram, ()))
+            if not candidates:
+                return []
+        keys = self.keys
+        return [position for position in sorted(candidates) if query in keys[position]]
+
+    def search(self, query):
+        """Names containing `query`, in catalog order."""
+        return [self.names[position] for position in self.positions(query)]
+
+    def canonical(self, name):
+        """The catalog spelling of `name` if it names a station (ignoring case and separators), else None."""
+        return self.by_key.get(normalize(name))
+
+    def suggest(self, query, limit=5, cutoff=0.2):
+        """
+        Stations whose names look like `query`, best first.
+
+        Args:
+            query (str): A possibly misspelled station name.
+            limit (int): Maximum number of candidates.
+            cutoff (float): Minimum trigram similarity (0-1) of a candidate.
+
+        Returns:
+            list: (name, similarity) pairs.
+        """
+        grams = trigrams(normalize(query))
+        shared = {}
+        for gram in grams:
+            for position in self.fuzzy.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        gram_counts = self.gram_counts
+        scored = [(count / (len(grams) + gram_counts[position] - count), position)
+                  for position, count in shared.items()]
+        scored = sorted((item for item in scored if item[0] >= cutoff), key=lambda item: (-item[0], item[1]))
+        return [(self.names[position], round(score, 3)) for score, position in scored[:limit]]
+
+    def resolve(self, query):
+        """
+        The station `query` names, correcting a misspelling when one station clearly matches best.
+
+        Returns:
+            tuple: (name or None, candidates) where candidates are suggest() results;
+                name is None when the query is too far from every station or ambiguous.
+        """
+        name = self.canonical(query)
+        if name is not None:
+            return name, [(name, 1.0)]
+        candidates = self.suggest(query)
+        if candidates and candidates[0][1] >= RESOLVE_CUTOFF and (
+                len(candidates) == 1 or candidates[0][1] - candidates[1][1] >= RESOLVE_MARGIN):
+            return candidates[0][0], candidates
+        return None, candidates
+
+
+class TrainIndex:
+    """
+    Lookup of trains by number and name.
+
+    Numbers are the catalog keys. Each name token (e.g. "mohanagar",
+    "express") is kept in a sorted list, so every token starting with a typed
+    word is found by bisection. Up and down trains share a number pair: an
+    odd number and the even number after it (701/702, 3107/3108).
+
+    Args:
+        trains (dict): Train number (str or int) -> train name, as in train.json.
+    """
+
+    def __init__(self, trains):
+        self.names = {int(number): name for number, name in trains.items()}
+        self.numbers = sorted(self.names)
+        self.number_keys = sorted(map(str, self.numbers))  # string order, for prefix bisection
+        by_token = {}
+        for number in self.numbers:
+            for token in set(normalize(self.names[number]).split()):
+                by_token.setdefault(token, []).append(number)
+        self.tokens = sorted(by_token)
+        self.by_token = by_token
+
+    def to_artifact(self):
+        return {"names": self.names, "tokens": self.by_token,
+                "pairs": {number: self.pair(number) for number in self.numbers if self.pair(number)}}
+
+    @classmethod
+    def from_artifact(cls, data):
+        """Rebuild the index from to_artifact() output (as decoded from JSON)."""
+        index = cls.__new__(cls)
+        index.names = {int(number): name for number, name in data["names"].items()}
+        index.numbers = sorted(index.names)
+        index.number_keys = sorted(data["names"])
+        index.by_token = data["tokens"]
+        index.tokens = sorted(index.by_token)
+        return index
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __contains__(self, number):
+        return self._number(number) in self.names
+
+    @staticmethod
+    def _number(number):
+        try:
+            return int(number)
+        except (TypeError, ValueError):
+            return None
+
+    def name(self, number):
+        """Name of train `number`, or None if it is not in the catalog."""
+        return self.names.get(self._number(number))
+
+    def pair(self, number):
+        """The train running the same route in the other direction, or None."""
+        number = self._number(number)
+        if number is None:
+            return None
+        other = number + 1 if number % 2 else number - 1
+        return other if number in self.names and other in self.names else None
+
+    def _token_numbers(self, word):
+        start = bisect.bisect_left(self.tokens, word)
+        numbers = set()
+        for token in self.tokens[start:]:
+            if not token.startswith(word):
+                break
+            numbers.update(self.by_token[token])
+        return numbers
+
+    def search(self, query):
+        """
+        Trains matching `query`.
+
+        A query of digits matches train numbers starting with it; otherwise
+        every word of the query must start some word of the train's name.
+
+        Returns:
+            list: Matching train numbers (ints), in ascending order.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        if query.isdigit():
+            start = bisect.bisect_left(self.number_keys, query)
+            end = bisect.bisect_left(self.number_keys, query + "\x7f", start)
+            return sorted(map(int, self.number_keys[start:end]))
+        words = query.split()
+        numbers = self._token_numbers(words[0])
+        for word in words[1:]:
+            if not numbers:
+                break
+            numbers &= self._token_numbers(word)
+        return sorted(numbers)
+
+    def label(self, number):
+        """Display text for a train, e.g. "Subarna Express (701)"."""
+        return f"{self.names[number]} ({number})"
+
+    def resolve(self, text):
+        """
+        Train number for text typed or picked in a form: a bare number, a
+        label() string, or a name that matches exactly one train.
+
+        Returns:
+            int: The train number, or None if `text` does not name exactly one train.
+        """
+        text = str(text).strip()
+        if text.endswith(")") and "(" in text:
+            text = text.rsplit("(", 1)[1].rstrip(")")
+        if text.isdigit():
+            return int(text) if int(text) in self.names else None
+        matches = self.search(text)
+        return matches[0] if len(matches) == 1 else None
+
+
+def _fingerprint(path):
+    with open(path, "rb") as file:
+        digest = hashlib.sha256(file.read()).hexdigest()
+    return {"mtime_ns": os.stat(path).st_mtime_ns, "sha256": digest}
+
+
+def build_catalog(directory=CATALOG_DIR):
+    """
+    Index station.json and train.json and write the result to catalog.json.
+
+    Returns:
+        tuple: (StationIndex, TrainIndex).
+    """
+    with open(os.path.join(directory, "station.json"), encoding="utf-8") as file:
+        stations = StationIndex(json.load(file)["stations"])
+    with open(os.path.join(directory, "train.json"), encoding="utf-8") as file:
+        trains = TrainIndex(json.load(file))
+    artifact = {
+        "version": CATALOG_VERSION,
+        "sources": {name: _fingerprint(os.path.join(directory, name)) for name in SOURCES},
+        "stations": stations.to_artifact(),
+        "trains": trains.to_artifact(),
+    }
+    tmp_path = os.path.join(directory, f"{CATALOG_FILE}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(artifact, file, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        os.replace(tmp_path, os.path.join(directory, CATALOG_FILE))
+    except OSError:
+        pass  # A read-only checkout still works, it just indexes on every start
+    return stations, trains
+
+
+def _is_current(artifact, directory):
+    """Whether the artifact was built from the catalogs now on disk."""
+    if artifact.get("version") != CATALOG_VERSION:
+        return False
+    for name in SOURCES:
+        path, recorded = os.path.join(directory, name), artifact["sources"].get(name, {})
+        try:
+            if os.stat(path).st_mtime_ns == recorded.get("mtime_ns"):
+                continue
+            # A fresh checkout changes mtimes but not content
+            if _fingerprint(path)["sha256"] != recorded.get("sha256"):
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def load_catalog(directory=CATALOG_DIR):
+    """
+    The station and train indexes, from catalog.json if it is up to date.
+
+    Returns:
+        tuple: (StationIndex, TrainIndex).
+    """
+    try:
+        with open(os.path.join(directory, CATALOG_FILE), encoding="utf-8") as file:
+            artifact = json.load(file)
+    except (OSError, ValueError):
+        artifact = {}
+    if not artifact or not _is_current(artifact, directory):
+        return build_catalog(directory)
+    return StationIndex.from_artifact(artifact["stations"]), TrainIndex.from_artifact(artifact["trains"])
+
+
+def main(argv=None):
+    init(autoreset=True)
+    parser = argparse.ArgumentParser(description="Look up stations and trains in the catalogs.")
+    parser.add_argument("kind", choices=("build", "station", "train"))
+    parser.add_argument("query", nargs="*")
+    args = parser.parse_args(argv)
+    query = " ".join(args.query)
+
+    if args.kind == "build":
+        stations, trains = build_catalog()
+        print(f"{Fore.GREEN}Wrote {CATALOG_FILE}: {len(stations)} stations, {len(trains)} trains.")
+        return 0
+    stations, trains = load_catalog()
+    if args.kind == "train":
+        matches = trains.search(query)
+        for number in matches:
+            pair = trains.pair(number)
+            print(trains.label(number) + (f"  (return: {pair})" if pair else ""))
+        return 0 if matches else 1
+
+    name, candidates = stations.resolve(query)
+    if name:
+        print(f"{Fore.GREEN}{name}")
+    else:
+        print(f"{Fore.RED}No station clearly matches '{query}'.")
+    for candidate, score in candidates:
+        if candidate != name:
+            print(f"  {candidate:<24}{score:.2f}")
+    return 0 if name else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
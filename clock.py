@@ -0,0 +1,78 @@
+import time, asyncio
+from email.utils import parsedate_to_datetime
+
+
+class ServerClock:
+    """
+    Estimates the offset between the local clock and the server's clock.
+
+    Every response's `Date` header is a sample. The header has one-second
+    resolution and the server stamped it somewhere between sending the request
+    (local `sent`) and receiving the reply (local `received`), so each sample
+    bounds the offset to [date - received, date + 1 - sent]. Intersecting the
+    bounds of successive samples narrows the estimate well below one second,
+    especially when the samples straddle second boundaries, as in NTP's
+    interval-intersection step. The estimate is the middle of the interval.
+
+    Args:
+        max_age (float): Seconds after which the bounds are rebuilt, to follow local clock drift.
+    """
+
+    def __init__(self, max_age=600):
+        self.max_age = max_age
+        self.low = None
+        self.high = None
+        self.samples = 0
+        self.synced_at = None
+
+    def observe(self, date_header, sent, received):
+        """
+        Add a sample from one request.
+
+        Args:
+            date_header (str): The response's `Date` header.
+            sent (float): Local `time.time()` when the request was sent.
+            received (float): Local `time.time()` when the response arrived.
+        """
+        try:
+            server_time = parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError, IndexError):
+            return
+        low, high = server_time - received, server_time + 1 - sent
+        if self.low is None or received - self.synced_at > self.max_age:
+            self.low, self.high, self.samples = low, high, 0
+            self.synced_at = received
+        elif low > self.high or high < self.low:
+            # Disjoint with what we had: the local clock was stepped. Start over.
+            self.low, self.high, self.samples = low, high, 0
+            self.synced_at = received
+        else:
+            self.low, self.high = max(self.low, low), min(self.high, high)
+        self.samples += 1
+
+    @property
+    def offset(self):
+        """Server time minus local time in seconds (0 until the first sample)."""
+        return 0.0 if self.low is None else (self.low + self.high) / 2
+
+    @property
+    def uncertainty(self):
+        """Half-width of the offset interval in seconds, or None before the first sample."""
+        return None if self.low is None else (self.high - self.low) / 2
+
+    def now(self):
+        """Current server time as a Unix timestamp."""
+        return time.time() + self.offset
+
+    async def sleep_until(self, server_timestamp, step=30):
+        """
+        Sleep until the server clock reaches `server_timestamp`.
+
+        Long waits are split into `step`-second sleeps so that samples taken in
+        the meantime (e.g. by a periodic re-sync) still move the wake-up time.
+        """
+        while True:
+            remaining = server_timestamp - self.now()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, step))
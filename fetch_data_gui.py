@@ -1,19 +1,16 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-import json
 from tkcalendar import DateEntry  # Import DateEntry from tkcalendar
+from catalog import load_catalog, normalize
 
 def fetchDataUsingGui():
-    # Load station data
-    with open('station.json', 'r') as file:
-        station_data = json.load(file)
+    # Load the station and train indexes (prebuilt in catalog.json)
+    station_index, train_index = load_catalog()
+    station_matches = {}  # listbox -> (normalized query, station positions shown)
+    train_choice = {'shown': [], 'number': None}  # Train numbers listed, and the one picked
 
-    # Load train data
-    with open('train.json', 'r') as file:
-        train_data = json.load(file)
-
-    # Global variable to store the booking info
+    # The booking info, set by submit_form
     train_booking_info = None
 
     def toggle_password_visibility():
@@ -25,12 +22,27 @@ def fetchDataUsingGui():
             toggle_btn.config(text='Hide')
 
     def on_station_type(event, entry, listbox):
-        typed = entry.get()
-        listbox.delete(0, tk.END)
-        if typed:
-            for station in station_data['stations']:
-                if typed.lower() in station.lower():
-                    listbox.insert(tk.END, station)
+        typed = normalize(entry.get())
+        last_typed, shown = station_matches.get(listbox, ('', []))
+        if typed == last_typed:
+            return
+        narrowed = bool(last_typed) and last_typed in typed
+        matches = station_index.positions(typed, within=shown if narrowed else None) if typed else []
+        if narrowed and matches and len(matches) * 2 >= len(shown):
+            # Only a few rows dropped out: delete those instead of refilling the whole listbox
+            keep = set(matches)
+            for row in range(len(shown) - 1, -1, -1):
+                if shown[row] not in keep:
+                    listbox.delete(row)
+        else:
+            listbox.delete(0, tk.END)
+            if matches:
+                listbox.insert(tk.END, *(station_index.names[position] for position in matches))
+            elif len(typed) >= 3:
+                # Nothing contains the text: offer the closest spellings, and start afresh on the next key
+                listbox.insert(tk.END, *(name for name, _ in station_index.suggest(typed)))
+                typed = None
+        station_matches[listbox] = (typed, matches)
         listbox.lift()  # Ensure the listbox is on top
         listbox.place(x=entry.winfo_x(), y=entry.winfo_y() + entry.winfo_height())
 
@@ -41,17 +53,18 @@ def fetchDataUsingGui():
 
     def on_train_type(event, entry, listbox):
         typed = entry.get()
+        train_choice['shown'] = train_index.search(typed)
+        train_choice['number'] = train_index.resolve(typed)  # A typed number or unique name needs no pick
         listbox.delete(0, tk.END)
-        if typed:
-            for number, name in train_data.items():
-                if typed.lower() in name.lower():
-                    listbox.insert(tk.END, f"{name}({number})")
+        if train_choice['shown']:
+            listbox.insert(tk.END, *map(train_index.label, train_choice['shown']))
         listbox.lift()  # Ensure the listbox is on top
         listbox.place(x=entry.winfo_x(), y=entry.winfo_y() + entry.winfo_height())
 
     def on_train_select(event, entry, listbox):
+        train_choice['number'] = train_choice['shown'][listbox.index(tk.ACTIVE)]
         entry.delete(0, tk.END)
-        entry.insert(0, listbox.get(tk.ACTIVE))
+        entry.insert(0, train_index.label(train_choice['number']))
         listbox.place_forget()
 
     def on_date_select(event, entry, cal):
@@ -66,7 +79,7 @@ def fetchDataUsingGui():
             submit_btn.config(state=tk.DISABLED)
 
     def submit_form():
-        global train_booking_info  # Access the global variable
+        nonlocal train_booking_info  # Store the result for fetchDataUsingGui to return
         train_booking_info = {
             'mobile_number': phone_entry.get(),
             'password': password_entry.get(),
@@ -74,7 +87,7 @@ def fetchDataUsingGui():
             'to_station': destination_entry.get(),
             'journey_date': date_entry.get(),
             'seat_class': class_var.get(),
-            'train_number': train_entry.get().split('(')[-1].rstrip(')'),
+            'train_number': train_choice['number'] or train_index.resolve(train_entry.get()),
             'seat': seat_var.get(),
             'desired_seats': []
         }
@@ -163,4 +176,5 @@ def fetchDataUsingGui():
         print("No booking information was stored.")
 
 
-fetchDataUsingGui()
\ No newline at end of file
+if __name__ == "__main__":
+    fetchDataUsingGui()
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Local stand-in for the Shohoz railway API, for offline end-to-end runs.
+
+Implements the endpoints script.py calls (sign-in, search-trips-v2,
+seat-layout, reserve-seat, passenger-details, verify-otp, confirm) with
+configurable latency, 5xx injection and seat contention. Point the client
+at it with SHOHOZ_API_BASE:
+
+    python mock_server.py --opens-in 20 --latency-ms 40 --error-rate 0.05
+    SHOHOZ_API_BASE=http://127.0.0.1:8080/v1.0/app python script.py
+
+GET /__stats returns per-endpoint request counts and status codes.
+"""
+import argparse, asyncio, random, time, uuid
+from collections import Counter, defaultdict
+import jwt
+from aiohttp import web
+
+from bench_seat_selection import make_seat_layout
+
+
+PREFIX = "/v1.0/app"
+
+
+def error(status, messages):
+    return web.json_response({"error": {"messages": messages}}, status=status)
+
+
+class MockShohoz:
+    """
+    In-memory booking backend.
+
+    Args:
+        opens_in (float): Seconds from startup until the seat layout opens.
+        wait_window (float): Before opening, further away than this the seat layout
+            answers with a "N minutes M seconds" wait; closer, with "will be available".
+        latency_ms (float): Mean added response latency.
+        jitter_ms (float): Uniform jitter added on top of `latency_ms`.
+        error_rate (float): Probability that any request fails with a random 5xx.
+        bad_body_rate (float): Probability that any request is answered 200 with an
+            HTML page instead of JSON, like a misbehaving proxy.
+        contention (float): Probability that a free seat is lost to another buyer
+            at the moment it is reserved.
+        occupancy (float): Fraction of seats already sold when the layout opens.
+        otp (str): The OTP that verify-otp accepts.
+        seed (int): Random seed for the layout and injected failures.
+        revoke_tokens (bool): Answer 401 to tokens this instance did not issue, like
+            a server that revoked the tokens of earlier sessions.
+        password (str): The only password sign-in accepts; any password if None.
+    """
+
+    def __init__(self, opens_in=10, wait_window=30, latency_ms=30, jitter_ms=20, error_rate=0.0, bad_body_rate=0.0,
+                 contention=0.0, occupancy=0.6, coaches=15, rows=20, otp="1234", seed=0,
+                 revoke_tokens=False, password=None):
+        self.opens_at = time.time() + opens_in
+        self.wait_window = wait_window
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.bad_body_rate = bad_body_rate
+        self.contention = contention
+        self.otp = otp
+        self.revoke_tokens = revoke_tokens
+        self.password = password
+        self.issued = set()
+        self.rng = random.Random(seed)
+        self.layout = make_seat_layout(coaches, rows, occupancy=occupancy, seed=seed)
+        self.seats = {seat["ticket_id"]: seat for coach in self.layout for row in coach["layout"] for seat in row}
+        self.reserved = defaultdict(list)   # token -> ticket IDs
+        self.stats = defaultdict(Counter)   # endpoint -> status code counts
+
+    def token(self, mobile_number):
+        claims = {
+            "email": f"{mobile_number}@example.com",
+            "phone_number": mobile_number,
+            "display_name": "Mock Passenger",
+            "exp": int(time.time()) + 6 * 3600,
+        }
+        token = jwt.encode(claims, "mock-secret", algorithm="HS256")
+        self.issued.add(token)
+        return token
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        delay = self.latency_ms + self.rng.uniform(0, self.jitter_ms)
+        await asyncio.sleep(delay / 1000)
+        endpoint = request.path[len(PREFIX):] if request.path.startswith(PREFIX) else request.path
+        if endpoint != "/__stats" and self.rng.random() < self.error_rate:
+            response = web.json_response({"error": "injected"}, status=self.rng.choice([500, 502, 503, 504]))
+        elif self.bad_body_rate and endpoint != "/__stats" and self.rng.random() < self.bad_body_rate:
+            response = web.Response(text="<html><body>Bad gateway</body></html>", content_type="text/html")
+        elif endpoint.startswith("/bookings/") and not self.authorized(request.headers.get("Authorization", "")):
+            response = error(401, {"message": "Unauthenticated"})
+        else:
+            response = await handler(request)
+        self.stats[endpoint][response.status] += 1
+        return response
+
+    def authorized(self, header):
+        if not header.startswith("Bearer "):
+            return False
+        return not self.revoke_tokens or header[len("Bearer "):] in self.issued
+
+    async def sign_in(self, request):
+        body = await request.json()
+        if not body.get("mobile_number") or not body.get("password"):
+            return error(422, {"message": "Mobile number and password are required"})
+        if self.password is not None and body["password"] != self.password:
+            return error(401, {"message": "Invalid credentials"})
+        return web.json_response({"data": {"token": self.token(body["mobile_number"])}})
+
+    async def search_trips(self, request):
+        query = request.query
+        trip_id = 9000 + len(query.get("from_city", ""))
+        trains = [{
+            "trip_number": f"MOCK EXPRESS ({train_model})",
+            "train_model": str(train_model),
+            "boarding_points": [{"trip_point_id": 70001}],
+            "seat_types": [{"type": query.get("seat_class"), "trip_id": trip_id, "trip_route_id": trip_id * 10}],
+        } for train_model in (701, 702, 705, 706, 789)]
+        return web.json_response({"data": {"trains": trains}})
+
+    async def seat_layout(self, request):
+        remaining = self.opens_at - time.time()
+        if remaining > self.wait_window:
+            minutes, seconds = divmod(int(remaining), 60)
+            return error(422, {"message": f"Please try again after {minutes} minutes {seconds} seconds", "errorKey": "TryAgainLater"})
+        if remaining > 0:
+            opens_at = time.strftime("%I:%M:%S %p", time.localtime(self.opens_at))
+            return error(422, {"message": f"ticket purchase for this trip will be available at {opens_at}", "errorKey": "NotOpenYet"})
+        return web.json_response({"data": {"seatLayout": self.layout}})
+
+    async def reserve_seat(self, request):
+        body = await request.json()
+        token = request.headers["Authorization"]
+        seat = self.seats.get(body.get("ticket_id"))
+        if len(self.reserved[token]) >= 4:
+            return error(422, {"error_msg": "Maximum 4 seats can be booked at a time"})
+        if seat is None or seat["seat_availability"] != 1 or self.rng.random() < self.contention:
+            if seat is not None:
+                seat["seat_availability"] = 0
+            return error(422, {"error_msg": "Sorry! this ticket is not available now."})
+        seat["seat_availability"] = 0
+        self.reserved[token].append(seat["ticket_id"])
+        return web.json_response({"data": {"ack": 1}})
+
+    async def passenger_details(self, request):
+        return web.json_response({"data": {"success": True, "msg": f"OTP sent ({self.otp})"}})
+
+    async def verify_otp(self, request):
+        body = await request.json()
+        if str(body.get("otp")) != self.otp:
+            return error(422, {"message": "OTP does not match", "errorKey": "OtpNotVerified"})
+        return web.json_response({"data": {"success": True}})
+
+    async def confirm(self, request):
+        body = await request.json()
+        if str(body.get("otp")) != self.otp:
+            return error(422, {"message": "OTP does not match", "errorKey": "OtpNotVerified"})
+        redirect_url = f"{request.scheme}://{request.host}/pay/{uuid.uuid4().hex}"
+        return web.json_response({"data": {"redirectUrl": redirect_url}})
+
+    async def stats_handler(self, request):
+        return web.json_response({endpoint: dict(counts) for endpoint, counts in self.stats.items()})
+
+    def app(self):
+        app = web.Application(middlewares=[self.middleware])
+        app.add_routes([
+            web.post(f"{PREFIX}/auth/sign-in", self.sign_in),
+            web.get(f"{PREFIX}/bookings/search-trips-v2", self.search_trips),
+            web.get(f"{PREFIX}/bookings/seat-layout", self.seat_layout),
+            web.patch(f"{PREFIX}/bookings/reserve-seat", self.reserve_seat),
+            web.post(f"{PREFIX}/bookings/passenger-details", self.passenger_details),
+            web.post(f"{PREFIX}/bookings/verify-otp", self.verify_otp),
+            web.patch(f"{PREFIX}/bookings/confirm", self.confirm),
+            web.get("/__stats", self.stats_handler),
+        ])
+        return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local mock of the Shohoz railway API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--opens-in", type=float, default=10, help="seconds until the seat layout opens")
+    parser.add_argument("--wait-window", type=float, default=30, help="answer with 'N minutes M seconds' when further away than this")
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an injected 5xx")
+    parser.add_argument("--bad-body-rate", type=float, default=0.0, help="probability of a 200 with an HTML body")
+    parser.add_argument("--contention", type=float, default=0.0, help="probability a seat is lost to another buyer")
+    parser.add_argument("--occupancy", type=float, default=0.6)
+    parser.add_argument("--coaches", type=int, default=15)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--otp", default="1234")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--revoke-tokens", action="store_true", help="reject tokens issued before this run (401)")
+    parser.add_argument("--password", help="the only password sign-in accepts")
+    args = parser.parse_args(argv)
+    server = MockShohoz(
+        opens_in=args.opens_in, wait_window=args.wait_window, latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms, error_rate=args.error_rate, bad_body_rate=args.bad_body_rate, contention=args.contention,
+        occupancy=args.occupancy, coaches=args.coaches, rows=args.rows, otp=args.otp, seed=args.seed,
+        revoke_tokens=args.revoke_tokens, password=args.password,
+    )
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
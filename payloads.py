@@ -0,0 +1,173 @@
+"""
+Decoding of Shohoz API responses, on the fastest JSON backend installed.
+
+With msgspec, the seat-layout, search-trips and error payloads are decoded
+straight into typed structs that only keep the fields the client reads. The
+structs also answer `obj["key"]` and `obj.get("key")`, so code written against
+the plain dicts works on both. Without msgspec, orjson (or else the standard
+library) decodes into plain dicts.
+
+A body that is not a JSON object, such as an HTML error page from a proxy or
+an empty body, raises BadResponse, which callers retry like a network error.
+
+    pip install msgspec    # or: pip install orjson
+"""
+import json
+from typing import Optional, Union
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if msgspec is not None:
+    BACKEND = "msgspec"
+    loads = msgspec.json.Decoder().decode
+elif orjson is not None:
+    BACKEND = "orjson"
+    loads = orjson.loads
+else:
+    BACKEND = "json"
+    loads = json.loads
+
+DECODE_ERRORS = (ValueError, msgspec.DecodeError) if msgspec is not None else (ValueError,)
+
+
+class BadResponse(ValueError):
+    """A response body that is not the JSON object the API sends."""
+
+
+if msgspec is not None:
+
+    class Payload(msgspec.Struct, frozen=True, gc=False):
+        """Base for the response structs: read-only dict-style access to the fields."""
+
+        def __getitem__(self, key):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+
+        def get(self, key, default=None):
+            return getattr(self, key, default)
+
+    class Seat(Payload):
+        ticket_id: int
+        seat_number: str
+        seat_availability: int
+
+    class Coach(Payload):
+        floor_name: Optional[str] = None
+        layout: list[list[Seat]] = []
+
+    class SeatLayoutData(Payload):
+        seatLayout: Optional[list[Coach]] = None
+
+    class SeatLayoutResponse(Payload):
+        data: SeatLayoutData = SeatLayoutData()
+
+    class SeatType(Payload):
+        type: Optional[str] = None
+        trip_id: Optional[int] = None
+        trip_route_id: Optional[int] = None
+
+    class BoardingPoint(Payload):
+        trip_point_id: Optional[int] = None
+
+    class Train(Payload):
+        train_model: Optional[str] = None
+        trip_number: Optional[str] = None
+        boarding_points: list[BoardingPoint] = []
+        seat_types: list[SeatType] = []
+
+    class TripsData(Payload):
+        trains: list[Train] = []
+
+    class TripsResponse(Payload):
+        data: TripsData = TripsData()
+
+    class ErrorBody(Payload):
+        messages: Union[list, dict, str, None] = None
+
+    class ErrorResponse(Payload):
+        error: ErrorBody = ErrorBody()
+
+    _seat_layout_decoder = msgspec.json.Decoder(SeatLayoutResponse)
+    _trips_decoder = msgspec.json.Decoder(TripsResponse)
+    _error_decoder = msgspec.json.Decoder(ErrorResponse)
+
+
+def _load_object(text):
+    try:
+        value = loads(text)
+    except DECODE_ERRORS as e:
+        raise BadResponse(f"Response is not JSON: {text[:80]!r}") from e
+    if not isinstance(value, dict):
+        raise BadResponse(f"Response is not a JSON object: {text[:80]!r}")
+    return value
+
+
+def decode_seat_layout(text):
+    """
+    Decode a seat-layout response body.
+
+    Returns:
+        list: The coaches in `data.seatLayout`, or None if the payload has no seat layout.
+
+    Raises:
+        BadResponse: If the body is not a JSON object.
+    """
+    if msgspec is not None:
+        try:
+            return _seat_layout_decoder.decode(text).data.seatLayout
+        except msgspec.ValidationError:
+            pass
+        except msgspec.DecodeError as e:
+            raise BadResponse(f"Response is not JSON: {text[:80]!r}") from e
+    return (_load_object(text).get("data") or {}).get("seatLayout")
+
+
+def decode_trains(text):
+    """
+    Decode a search-trips-v2 response body.
+
+    Returns:
+        list: The trains in `data.trains` (empty if there are none).
+
+    Raises:
+        BadResponse: If the body is not a JSON object.
+    """
+    if msgspec is not None:
+        try:
+            return _trips_decoder.decode(text).data.trains
+        except msgspec.ValidationError:
+            pass
+        except msgspec.DecodeError as e:
+            raise BadResponse(f"Response is not JSON: {text[:80]!r}") from e
+    return (_load_object(text).get("data") or {}).get("trains") or []
+
+
+def decode_error(text):
+    """
+    Decode an error response body.
+
+    Returns:
+        list, dict or str: The `error.messages` field, or "" if it is missing.
+
+    Raises:
+        BadResponse: If the body is not a JSON object.
+    """
+    if msgspec is not None:
+        try:
+            return _error_decoder.decode(text).error.messages or ""
+        except msgspec.ValidationError:
+            pass
+        except msgspec.DecodeError as e:
+            raise BadResponse(f"Response is not JSON: {text[:80]!r}") from e
+    return (_load_object(text).get("error") or {}).get("messages", "")
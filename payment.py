@@ -0,0 +1,79 @@
+PAYMENT_METHODS = {
+    "bkash": ("bKash", {"is_bkash_online": True, "selected_mobile_transaction": 1}),
+    "nagad": ("Nagad", {"is_bkash_online": False, "selected_mobile_transaction": 3}),
+    "rocket": ("Rocket", {"is_bkash_online": False, "selected_mobile_transaction": 4}),
+    "upay": ("Upay", {"is_bkash_online": False, "selected_mobile_transaction": 5}),
+    "visa": ("VISA", {"is_bkash_online": False, "pg": "visa"}),
+    "mastercard": ("Mastercard", {"is_bkash_online": False, "pg": "mastercard"}),
+    "nexus": ("DBBL Nexus", {"is_bkash_online": False, "pg": "nexus"}),
+}
+PAYMENT_CHOICES = list(PAYMENT_METHODS)
+
+
+def resolve_payment_method(choice):
+    """
+    Look up a payment method by menu number ("1" - "7") or name ("bkash", "visa", ...).
+
+    Returns:
+        str: The PAYMENT_METHODS key, or None if `choice` is not a known method.
+    """
+    choice = str(choice or "").strip().lower().replace(" ", "")
+    if choice.isdigit() and 1 <= int(choice) <= len(PAYMENT_CHOICES):
+        return PAYMENT_CHOICES[int(choice) - 1]
+    if choice in PAYMENT_METHODS:
+        return choice
+    for key, (label, _) in PAYMENT_METHODS.items():
+        if label.lower().replace(" ", "") == choice:
+            return key
+    return None
+
+
+def compile_confirm_template(booking_info, trip_id, route_id, boarding_id, email, phone):
+    """
+    Build the part of the confirm payload that is fixed once the trip is known.
+
+    Args:
+        booking_info (dict): The train_booking_info settings.
+        trip_id, route_id, boarding_id: IDs returned by the trip search.
+        email (str), phone (str): Contact details from the auth token.
+
+    Returns:
+        dict: Payload fields shared by every confirm request for this trip.
+    """
+    return {
+        "boarding_point_id": boarding_id,
+        "from_city": booking_info["from_station"],
+        "to_city": booking_info["to_station"],
+        "date_of_journey": booking_info["journey_date"],
+        "seat_class": booking_info["seat_class"],
+        "pmobile": phone,
+        "pemail": email,
+        "trip_id": trip_id,
+        "trip_route_id": route_id,
+        "contactperson": 0,
+    }
+
+
+def build_confirm_payload(template, ticket_ids, passenger_names, payment_method, otp=None):
+    """
+    Fill the reserved tickets, passengers and payment method into a confirm template.
+
+    Args:
+        template (dict): Result of compile_confirm_template.
+        ticket_ids (list): Reserved ticket IDs.
+        passenger_names (list): One name per ticket.
+        payment_method (str): A PAYMENT_METHODS key.
+        otp (str): The OTP, if already known.
+
+    Returns:
+        dict: The complete confirm payload.
+    """
+    return {
+        **template,
+        **PAYMENT_METHODS[payment_method][1],
+        "passengerType": ["Adult"] * len(ticket_ids),
+        "gender": ["male"] * len(ticket_ids),
+        "pname": passenger_names,
+        "ticket_ids": ticket_ids,
+        "otp": otp,
+    }
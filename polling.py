@@ -0,0 +1,121 @@
+import re, time, random, asyncio
+
+
+WAIT_PATTERN = re.compile(r"(\d+)\s*minute[s]?\s*(\d+)\s*second[s]?", re.IGNORECASE)
+OPENING_PATTERN = re.compile(r"available at\s+(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([AP]M)?", re.IGNORECASE)
+
+
+def parse_wait(message):
+    """
+    Read the wait announced in a seat-layout 422 such as "Please try again after 2 minutes 5 seconds".
+
+    Returns:
+        int: The wait in seconds, or None if the message carries none.
+    """
+    match = WAIT_PATTERN.search(message or "")
+    if not match:
+        return None
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def parse_opening(message, now):
+    """
+    Read the opening time announced in a seat-layout 422 such as
+    "ticket purchase for this trip will be available at 08:00:00 AM".
+
+    Args:
+        message (str): The error message.
+        now (float): Current server time; the announced clock time is taken on
+            this (local) day, or the next one if it is more than 12 hours past.
+
+    Returns:
+        float: The opening as a Unix timestamp, or None if the message names no time.
+    """
+    match = OPENING_PATTERN.search(message or "")
+    if not match:
+        return None
+    hour, minute, second = int(match.group(1)), int(match.group(2)), int(match.group(3) or 0)
+    if match.group(4):
+        hour = hour % 12 + (12 if match.group(4).upper() == "PM" else 0)
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    day = time.localtime(now)
+    opens_at = time.mktime((day.tm_year, day.tm_mon, day.tm_mday, hour, minute, second, 0, 0, -1))
+    return opens_at + 24 * 3600 if opens_at < now - 12 * 3600 else opens_at
+
+
+class PollScheduler:
+    """
+    Decides how long to wait between seat-layout polls.
+
+    While the server announces a wait, the poller sleeps until shortly before
+    the window opens. Near the opening it polls back-to-back at the measured
+    round-trip time, bounded by `min_interval` and `max_interval`, so there is
+    roughly one request in flight at a time. Server errors back off exponentially
+    with full jitter, so a struggling server is not hammered in lockstep.
+
+    Args:
+        min_interval (float): Shortest gap between the starts of two polls, in seconds.
+        max_interval (float): Longest gap between polls while waiting for the opening.
+        rtt_factor (float): Poll interval as a multiple of the smoothed round-trip time.
+        lead (float): Seconds before an announced opening at which polling resumes.
+        backoff_base (float): First backoff delay after a server error.
+        backoff_cap (float): Upper bound for the backoff delay.
+        opening_interval (float): Shortest gap between polls while the server says
+            the trip is about to open, e.g. once the announced opening has passed
+            but the layout is not served yet.
+    """
+
+    def __init__(self, min_interval=0.05, max_interval=1.0, rtt_factor=1.0, lead=2.0,
+                 backoff_base=0.25, backoff_cap=8.0, opening_interval=0.2, rng=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.rtt_factor = rtt_factor
+        self.lead = lead
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.opening_interval = opening_interval
+        self.rng = rng or random.Random()
+        self.rtt = None
+        self.failures = 0
+        self.last_start = None
+
+    def started(self):
+        """Mark the start of a poll request."""
+        self.last_start = time.perf_counter()
+
+    def finished(self):
+        """Record the round-trip time of the poll started last (exponentially smoothed)."""
+        rtt = time.perf_counter() - self.last_start
+        self.rtt = rtt if self.rtt is None else 0.8 * self.rtt + 0.2 * rtt
+
+    @property
+    def interval(self):
+        if self.rtt is None:
+            return self.min_interval
+        return min(self.max_interval, max(self.min_interval, self.rtt * self.rtt_factor))
+
+    def next_delay(self):
+        """Delay before the next poll, counting the time the last one already took."""
+        self.failures = 0
+        if self.last_start is None:
+            return 0.0
+        return max(0.0, self.interval - (time.perf_counter() - self.last_start))
+
+    def backoff_delay(self):
+        """Delay after a server or network error: full-jitter exponential backoff."""
+        self.failures += 1
+        return self.rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** (self.failures - 1)))
+
+    def opening_delay(self):
+        """Delay before the next poll while the trip is announced as about to open."""
+        return max(self.opening_interval, self.next_delay())
+
+    def wait_delay(self, seconds):
+        """Delay for a server-announced wait, waking `lead` seconds early."""
+        self.failures = 0
+        return max(self.next_delay(), seconds - self.lead)
+
+    async def sleep(self, delay):
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -1,31 +1,39 @@
-import os, sys, time, re, ssl  
-import jwt, requests, aiohttp, asyncio, certifi  
-from concurrent.futures import ThreadPoolExecutor
+import os, sys, time  
+import jwt, aiohttp, asyncio  
+from functools import lru_cache
 from dotenv import load_dotenv
 from colorama import Fore, init
 import webbrowser
+from shohoz_client import ShohozClient, AuthenticationError, API_BASE
+from seat_selection import IncrementalSelector, SeatMap
+from polling import PollScheduler, parse_wait, parse_opening
+from payloads import decode_seat_layout, decode_trains, decode_error, BadResponse
+from timeline import BookingTimeline
+from cache import TokenCache, TripCache
+from booking_state import BookingState, Stage
+from clock import ServerClock
+from traffic import TrafficRecorder
+from booking_config import load_config, ConfigError, MAX_SEATS_PER_BOOKING
+from payment import (PAYMENT_METHODS, PAYMENT_CHOICES, resolve_payment_method,
+                     compile_confirm_template, build_confirm_payload)
 
 
 
 init(autoreset=True)  
 load_dotenv()
-train_booking_info = {
-    k: (int(v) if k in ["train_number", "seat"] else v.split(',') if k == "desired_seats" and v else v)
-    for k, v in {
-        "mobile_number": os.getenv("num"),
-        "password": os.getenv("passcode"),
-        "from_station": os.getenv("from_station"),
-        "to_station": os.getenv("to_station"),
-        "journey_date": os.getenv("journey_date"),
-        "seat_class": os.getenv("seat_class"),
-        "train_number": os.getenv("train_number"),
-        "seat": os.getenv("seat"),
-        "desired_seats": os.getenv("desired_seats")
-    }.items()
-}
+try:
+    train_booking_info = load_config(os.getenv("BOOKING_CONFIG"))
+except ConfigError as e:
+    print(Fore.RED + "Invalid booking config:")
+    for problem in e.problems:
+        print(Fore.RED + f"  - {problem}")
+    sys.exit(1)
+for correction in train_booking_info['corrections']:
+    print(Fore.YELLOW + correction)
+WARM_UP_LEAD = 60
 
-def auth_token(num, passcode, max_retries=50):
-    url = "https://railspaapi.shohoz.com/v1.0/app/auth/sign-in"
+async def auth_token(client, num, passcode, max_retries=50):
+    url = f"{API_BASE}/auth/sign-in"
     payload = {
         "mobile_number": num,
         "password": passcode
@@ -33,8 +41,8 @@ def auth_token(num, passcode, max_retries=50):
     retries = 0
     while retries < max_retries:
         try:
-            res = requests.post(url, json=payload)
-            if res.status_code == 200:
+            res = await client.post(url, json=payload, renew_auth=False)
+            if res.status == 200:
                 data = res.json()
                 token = data.get('data', {}).get('token')
                 if token:
@@ -44,39 +52,44 @@ def auth_token(num, passcode, max_retries=50):
                 else:
                     print(Fore.RED + "Failed to retrieve auth token from response.")
                     return None
-            elif res.status_code in [500, 502, 503, 504]:
-                print(Fore.YELLOW + f"Server error {res.status_code}. Retrying in 1 second... ({retries + 1}/{max_retries})")
-                time.sleep(1)
+            elif res.status in [500, 502, 503, 504]:
+                print(Fore.YELLOW + f"Server error {res.status}. Retrying in 1 second... ({retries + 1}/{max_retries})")
+                await asyncio.sleep(1)
                 retries += 1
             else:
-                print(Fore.RED + f"Error: {res.status_code} - {res.text}")
+                print(Fore.RED + f"Error: {res.status} - {res.text}")
                 return None
-        except requests.RequestException as e:
+        except (aiohttp.ClientError, BadResponse) as e:
             print(Fore.RED + f"Request error: {e}. Retrying in 1 second... ({retries + 1}/{max_retries})")
-            time.sleep(1)
+            await asyncio.sleep(1)
             retries += 1
     print(Fore.RED + "Max retries reached. Failed to obtain auth token.")
     return None
-token = auth_token(train_booking_info.get('mobile_number', ''), train_booking_info.get('password', ''))
-headers = {"Authorization": f"Bearer {token}"}
-def main():
-    def extract_user_info(auth_key):
-        try:
-            decoded_token = jwt.decode(
-                auth_key,
-                options={"verify_signature": False},  
-                algorithms=['RS256']  
-            )
-            email = decoded_token.get("email", "")  
-            phone = decoded_token.get("phone_number", "")  
-            name = decoded_token.get("display_name", "")  
-            print(f"{Fore.CYAN}Email: {email}, Phone: {phone}, Name: {name}")
-            return email, phone, name
-        except Exception as e:
-            print(f"{Fore.RED}Failed to decode auth token: {e}")
-            return None, None, None
-    def fetch_trip_details(from_city, to_city, date, seat_class, train_number):
-        url = "https://railspaapi.shohoz.com/v1.0/app/bookings/search-trips-v2"
+@lru_cache(maxsize=4)
+def extract_user_info(auth_key):
+    try:
+        decoded_token = jwt.decode(
+            auth_key,
+            options={"verify_signature": False},  
+            algorithms=['RS256']  
+        )
+        email = decoded_token.get("email", "")  
+        phone = decoded_token.get("phone_number", "")  
+        name = decoded_token.get("display_name", "")  
+        print(f"{Fore.CYAN}Email: {email}, Phone: {phone}, Name: {name}")
+        return email, phone, name
+    except Exception as e:
+        print(f"{Fore.RED}Failed to decode auth token: {e}")
+        return None, None, None
+async def ainput(prompt):
+    return await asyncio.to_thread(input, prompt)
+async def timed(stage, coro, **details):
+    with timeline.stage(stage, **details):
+        return await coro
+async def main(client, state, until=Stage.CONFIRMED):
+    global ticket_ids
+    async def fetch_trip_details(from_city, to_city, date, seat_class, train_number):
+        url = f"{API_BASE}/bookings/search-trips-v2"
         payload = {
             "from_city": from_city,
             "to_city": to_city,
@@ -86,12 +99,12 @@ def main():
         print(f"{Fore.YELLOW}Fetching trip details for {from_city} to {to_city} on {date}...")
         while True:
             try:
-                response = requests.get(url, headers=headers, params=payload)
-                if response.status_code == 200:
-                    data = response.json().get('data', {}).get('trains', [])
+                response = await client.get(url, params=payload)
+                if response.status == 200:
+                    data = decode_trains(response.text)
                     if not data:
                         print(f"{Fore.YELLOW}Trip details not available yet. Retrying in 1 second...")
-                        time.sleep(1)
+                        await asyncio.sleep(1)
                         continue
                     for train in data:
                         if train.get('train_model') == str(train_number):
@@ -99,263 +112,162 @@ def main():
                                 if seat.get("type") == seat_class:
                                     trip_id = seat.get('trip_id')
                                     route_id = seat.get('trip_route_id')
-                                    boarding_id = train.get('boarding_points', [{}])[0].get("trip_point_id", None)
+                                    boarding_id = (train.get('boarding_points') or [{}])[0].get("trip_point_id", None)
                                     train_name = train.get("trip_number")
                                     print(f"{Fore.YELLOW}Trip details found! Train: {train_name}, Trip ID: {trip_id}, Route ID: {route_id}, Boarding Point ID: {boarding_id}")
                                     return trip_id, route_id, boarding_id, train_name
                     print(f"{Fore.YELLOW}Train Number {train_number} with seat class {seat_class} not available. Retrying in 1 second...")
-                    time.sleep(1)
-                elif response.status_code in [500, 502, 503, 504]:
-                    print(Fore.YELLOW + f"Server error {response.status_code}. Retrying in 1 second...")
-                    time.sleep(1)
+                    await asyncio.sleep(1)
+                elif response.status in [500, 502, 503, 504]:
+                    print(Fore.YELLOW + f"Server error {response.status}. Retrying in 1 second...")
+                    await asyncio.sleep(1)
                 else:
-                    print(Fore.RED + f"Failed to fetch trip details: {response.status_code} - {response.text}")
+                    print(Fore.RED + f"Failed to fetch trip details: {response.status} - {response.text}")
                     print(f"{Fore.YELLOW}Server response: {response.text}")
-                    time.sleep(1)
-            except requests.RequestException as e:
+                    await asyncio.sleep(1)
+            except (aiohttp.ClientError, BadResponse) as e:
                 print(Fore.RED + f"Error during fetch trip details: {e}. Retrying in 1 second...")
-                time.sleep(1)
+                await asyncio.sleep(1)
     async def is_booking_available():
-        url = "https://railspaapi.shohoz.com/v1.0/app/bookings/seat-layout"
+        url = f"{API_BASE}/bookings/seat-layout"
         payload = {
             "trip_id": trip_id,
             "trip_route_id": route_id
         }
-        MIN_LOOP_INTERVAL = 0.001
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl_context=ssl_context)
-        start_time = time.perf_counter()
-        async with aiohttp.ClientSession(connector=connector) as session:
-            while True:
-                try:
-                    async with session.get(url, headers=headers, json=payload) as response:
-                        end_time = time.perf_counter()
-                        elapsed = end_time - start_time
-                        if response.status == 200:
-                            data = await response.json()
-                            if "seatLayout" in data.get("data", {}):
-                                print(f"{Fore.GREEN}Booking is now available!")
-                                return data["data"]["seatLayout"]  
-                        elif response.status in [500, 501, 503, 504]:
-                            print(f"{Fore.YELLOW}Server overloaded (HTTP {response.status}). Retrying...")
-                        elif response.status == 422:
-                            error_key = None
-                            error_data = await response.json()
-                            error_messages = error_data.get("error", {}).get("messages", "")
-                            if isinstance(error_messages, list):
-                                error_message = error_messages[0]
-                            elif isinstance(error_messages, dict):
-                                error_message = error_messages.get("message", "")
-                                error_key = error_messages.get("errorKey", "")
-                            else:
-                                error_message = "Unknown error"
-                            print(f"{Fore.CYAN}Server response: {error_data}")
-                            if "ticket purchase for this trip will be available" in error_message:
-                                print(f"{Fore.YELLOW}Booking is not open yet: {error_message}. Retrying...")
-                                await asyncio.sleep(MIN_LOOP_INTERVAL)
-                                continue
-                            if error_key == "OrderLimitExceeded":
-                                print(f"{Fore.RED}Error: You have reached the maximum ticket booking limit for {train_booking_info['from_station']} to {train_booking_info['to_station']} on {train_booking_info['journey_date']}.")
-                            else:
-                                time_match = re.search(r"(\d+)\s*minute[s]?\s*(\d+)\s*second[s]?", error_message, re.IGNORECASE)
-                                if time_match:
-                                    minutes = int(time_match.group(1))
-                                    seconds = int(time_match.group(2))
-                                    total_seconds = minutes * 60 + seconds
-                                    current_time_formatted = time.strftime("%I:%M:%S %p", time.localtime())
-                                    future_time_formatted = time.strftime("%I:%M:%S %p", time.localtime(time.time() + total_seconds))
-                                    print(f"{Fore.RED}Error: {error_message} Current system time is {current_time_formatted}. Try again after {future_time_formatted}.")
-                                else:
-                                    print(f"{Fore.YELLOW}{error_message} Please try again later.")
-                            return None  
+        scheduler = PollScheduler()
+        while True:
+            try:
+                scheduler.started()
+                response = await client.get(url, json=payload)
+                scheduler.finished()
+                if response.status == 200:
+                    seat_layout = decode_seat_layout(response.text)
+                    if seat_layout is not None:
+                        print(f"{Fore.GREEN}Booking is now available!")
+                        return SeatMap.from_layout(seat_layout)
+                    delay = scheduler.next_delay()
+                elif response.status in [500, 502, 503, 504]:
+                    delay = scheduler.backoff_delay()
+                    print(f"{Fore.YELLOW}Server overloaded (HTTP {response.status}). Retrying in {delay:.2f} seconds...")
+                elif response.status == 422:
+                    error_key = None
+                    error_messages = decode_error(response.text)
+                    if isinstance(error_messages, list):
+                        error_message = error_messages[0]
+                    elif isinstance(error_messages, dict):
+                        error_message = error_messages.get("message", "")
+                        error_key = error_messages.get("errorKey", "")
+                    else:
+                        error_message = "Unknown error"
+                    print(f"{Fore.CYAN}Server response: {response.text}")
+                    if "ticket purchase for this trip will be available" in error_message:
+                        opens_at = parse_opening(error_message, server_clock.now())
+                        wake_at = None if opens_at is None else opens_at - (server_clock.uncertainty or 0)
+                        if wake_at is not None and wake_at > server_clock.now():
+                            print(f"{Fore.YELLOW}Booking is not open yet: {error_message}. Polling resumes when it opens...")
+                            await sleep_warm(client, wake_at)
                         else:
-                            print(f"{Fore.RED}Failed to fetch seat layout. HTTP: {response.status}")
-                            text_resp = await response.text()
-                            print(f"{Fore.CYAN}Server response: {text_resp}")
-                except aiohttp.ClientError as e:
-                    end_time = time.perf_counter()
-                    elapsed = end_time - start_time
-                    print(f"{Fore.RED}An error occurred while checking booking availability: {e}")
-                if elapsed < MIN_LOOP_INTERVAL:
-                    await asyncio.sleep(MIN_LOOP_INTERVAL - elapsed)
+                            print(f"{Fore.YELLOW}Booking is not open yet: {error_message}. Retrying...")
+                            await scheduler.sleep(scheduler.opening_delay())
+                        continue
+                    if error_key == "OrderLimitExceeded":
+                        print(f"{Fore.RED}Error: You have reached the maximum ticket booking limit for {train_booking_info['from_station']} to {train_booking_info['to_station']} on {train_booking_info['journey_date']}.")
+                        sys.exit(1)
+                    total_seconds = parse_wait(error_message)
+                    if total_seconds is None:
+                        print(f"{Fore.YELLOW}{error_message} Please try again later.")
+                        trip_cache.invalidate(journey)
+                        return None
+                    delay = scheduler.wait_delay(total_seconds)
+                    current_time_formatted = time.strftime("%I:%M:%S %p", time.localtime())
+                    future_time_formatted = time.strftime("%I:%M:%S %p", time.localtime(time.time() + total_seconds))
+                    print(f"{Fore.YELLOW}{error_message} Current system time is {current_time_formatted}. "
+                          f"Booking opens at {future_time_formatted}; polling resumes in {delay:.1f} seconds.")
+                    await sleep_warm(client, server_clock.now() + delay)
+                    continue
+                elif response.status in [400, 404]:
+                    print(f"{Fore.RED}Trip was not found (HTTP {response.status}). Looking it up again...")
+                    trip_cache.invalidate(journey)
+                    return None
+                else:
+                    print(f"{Fore.RED}Failed to fetch seat layout. HTTP: {response.status}")
+                    print(f"{Fore.CYAN}Server response: {response.text}")
+                    delay = scheduler.backoff_delay()
+            except (aiohttp.ClientError, BadResponse) as e:
+                delay = scheduler.backoff_delay()
+                print(f"{Fore.RED}An error occurred while checking booking availability: {e}")
+            await scheduler.sleep(delay)
     def get_ticket_id(seat_layout,desired_seats,max_seat):
-
-
-
-
-        selected_seats = {}
-        if desired_seats:
-            for coach in seat_layout:
-                for row in coach['layout']:
-                    for seat in row:
-                        if(seat['seat_availability'] == 1 and seat['seat_number'] in desired_seats):
-                            selected_seats[seat['ticket_id']] = seat['seat_number']
-                            if(len(selected_seats)==max_seat):
-                                return selected_seats
-                    for coach in seat_layout:
-                        for row in coach['layout']:
-                            seat_numbers = [seat for seat in row if seat['seat_availability'] == 1]
-                            for desired_seat in desired_seats:
-                                nearby_seats = [s for s in seat_numbers if s['seat_number'] == desired_seat]
-                                if nearby_seats:
-                                    desired_index = seat_numbers.index(nearby_seats[0])
-                                    for offset in range(1,len(seat_numbers)):
-                                        if desired_index + offset < len(seat_numbers):
-                                            seat = seat_numbers[desired_index + offset]
-                                            if(seat['seat_availability']==1 and seat['seat_number'] not in selected_seats.values()):
-                                                selected_seats[seat['ticket_id']] = seat['seat_number']
-                                                if(len(selected_seats) == max_seat):
-                                                    return selected_seats
-                                        if desired_index - offset >=0:
-                                            seat = seat_numbers[desired_index - offset]
-                                            if seat['seat_availability'] == 1 and seat['seat_number'] not in selected_seats.values():
-                                                selected_seats[seat['ticket_id']] = seat['seat_number']
-                                                if(len(selected_seats)==max_seat):
-                                                    return selected_seats
-                    for coach in seat_layout:
-                        for row in coach['layout']:
-                            for seat in row:
-                                if(seat['seat_availability'] == 1 and seat['seat_number'] not in selected_seats.values()):
-                                    selected_seats[seat['ticket_id']] = seat['seat_number']
-                                    if(len(selected_seats) == max_seat):
-                                        return selected_seats
-        else:
-            selected_seats_list = []
-            all_available_seats = []
-            for layout in seat_layout:
-                coach_name = layout['floor_name']
-                seats = [seat for row in layout['layout'] for seat in row if seat['seat_availability']==1]
-                if seats:
-                    seats.sort(key = lambda x: int(x['seat_number'].split('-')[-1]))
-                    all_available_seats.append({'coach': coach_name,'seats':seats})
-            for coach_data in all_available_seats:
-                coach_name = coach_data['coach']
-                seats = coach_data['seats']
-                mid_index = len(seats) //2
-                for i in range(max(0,mid_index-max_seat),min(mid_index+1,len(seats) - max_seat+1)):
-                    block = seats[i:i + max_seat]
-                    seat_numbers = [int(seat['seat_number'].split('-')[-1]) for seat in block]
-                    if max(seat_numbers) - min(seat_numbers) == max_seat - 1:
-                        for seat in block:
-                            selected_seats[seat['ticket_id']] = seat['seat_number']
-                            if(len(selected_seats) >= max_seat):
-                                return selected_seats
-            for coach_data in all_available_seats:
-                if(len(selected_seats_list) >= max_seat):
-                    break
-                coach_name = coach_data['coach']
-                ets = coach_data['seats']
-                coach_selected_seats = []
-                mid_index = len(seats)//2
-                left = mid_index-1
-                right = mid_index
-                while(len(selected_seats_list) < max_seat and (left>=0 or right <len(seats))):
-                    if left >=0 and len(selected_seats_list) < max_seat:
-                        coach_selected_seats.append(seats[left])
-                        selected_seats_list.append(seats[left])
-                        left -= 1
-                    if right<len(seats) and len(selected_seats_list) < max_seat:
-                        coach_selected_seats.append(seats[right])
-                        selected_seats_list.append(seats[right])
-                        right + 1
-                if coach_selected_seats:
-                    for seat in coach_selected_seats:
-                        selected_seats[seat['ticket_id']] = seat['seat_number']
-                        if(len(selected_seats) >= max_seat):
-                            return selected_seats
-            if(len(selected_seats) < max_seat):
-                for coach_data in all_available_seats:
-                    if(len(selected_seats_list) >= max_seat):
-                        break
-                    coach_name = coach_data['coach']
-                    seats = coach_data['seats']
-                    for seat in seats:
-                        if len(selected_seats_list) >= max_seat:
-                            break
-                        if seat not in selected_seats.values():
-                            selected_seats[seat['ticket_id']] = seat['seat_number']
-                            selected_seats_list.append(seat)
-                            if(len(selected_seats) >= max_seat):
-                                return selected_seats
+        selected_seats = seat_selector.select(seat_layout, desired_seats, max_seat)
+        if len(selected_seats) >= max_seat:
+            return selected_seats
         if selected_seats:
             print(f"{Fore.YELLOW}Warning: Proceeding with {len(selected_seats)} instead of {max_seat}.")
             return selected_seats
         print(f"{Fore.RED} No seats available to proceed.")
         return None
-  
-  
-  
-  
-  
-  
-  
-  
-    async def reserve_seat():
+    async def reserve_seat(seat_layout):
         global ticket_ids
-        print(f"{Fore.YELLOW}Waiting for seat layout availability...")
-        seat_layout = await is_booking_available()
-        if not seat_layout:
-            print(f"{Fore.RED}Seat layout could not be retrieved. Exiting.")
-            return False
-        ticket_id_map = get_ticket_id(seat_layout, train_booking_info['desired_seats'], train_booking_info['seat'])
+        with timeline.stage("selection"):
+            ticket_id_map = get_ticket_id(seat_layout, train_booking_info['desired_seats'], train_booking_info['seat'])
         if not ticket_id_map:
             print(f"{Fore.RED}No matching seats found based on desired preferences. Exiting...")
             return False
         ticket_ids = list(ticket_id_map.keys())
         print(f"{Fore.GREEN}Seats matched Details: {', '.join([f'{ticket_id_map[ticket]} (Ticket ID: {ticket})' for ticket in ticket_ids])}")
-        successful_ticket_ids = []
-        stop_reservation_due_to_limit = False
-        def reserve_single_seat(ticket):
-            nonlocal stop_reservation_due_to_limit
-            if stop_reservation_due_to_limit:
-                return False
-            url = "https://railspaapi.shohoz.com/v1.0/app/bookings/reserve-seat"
+        limit_reached = asyncio.Event()
+        reservation_slots = asyncio.Semaphore(MAX_SEATS_PER_BOOKING)
+        async def reserve_single_seat(ticket):
+            url = f"{API_BASE}/bookings/reserve-seat"
             payload = {
                 "ticket_id": ticket,
                 "route_id": route_id
             }
-            while True:
-                try:
-                    response = requests.patch(url, headers=headers, json=payload)
-                    print(f"{Fore.CYAN}Response from Reserve Seat API for seat {ticket_id_map[ticket]} (Ticket ID: {ticket}): {response.text}")
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data['data'].get("ack") == 1:
-                            print(f"{Fore.GREEN}Seat {ticket_id_map[ticket]} (Ticket ID: {ticket}) reserved successfully.")
-                            successful_ticket_ids.append(ticket)
-                            return True
+            async with reservation_slots:
+                while True:
+                    if limit_reached.is_set():
+                        return "skipped"
+                    try:
+                        response = await client.patch(url, json=payload)
+                        print(f"{Fore.CYAN}Response from Reserve Seat API for seat {ticket_id_map[ticket]} (Ticket ID: {ticket}): {response.text}")
+                        if response.status == 200:
+                            data = response.json()
+                            if data['data'].get("ack") == 1:
+                                print(f"{Fore.GREEN}Seat {ticket_id_map[ticket]} (Ticket ID: {ticket}) reserved successfully.")
+                                return "reserved"
+                            else:
+                                print(f"{Fore.RED}Failed to reserve seat {ticket_id_map[ticket]} (Ticket ID: {ticket}): {data}")
+                                return "failed"
+                        elif response.status == 422:
+                            error_data = response.json()
+                            error_msg = error_data.get("error", {}).get("messages", {}).get("error_msg", "")
+                            if "Maximum 4 seats can be booked at a time" in error_msg:
+                                print(f"{Fore.RED}Error: {error_msg}. Stopping further seat reservation.")
+                                limit_reached.set()
+                                return "limit"
+                            elif "Sorry! this ticket is not available now." in error_msg:
+                                print(f"{Fore.RED}Seat {ticket_id_map[ticket]} (Ticket ID: {ticket}) is not available now. Skipping retry...")
+                                return "unavailable"
+                            else:
+                                print(f"{Fore.RED}Error: {response.status} - {response.text}")
+                                return "failed"
+                        elif response.status in [500, 502, 503, 504]:
+                            print(f"{Fore.YELLOW}Server Overloaded (HTTP {response.status}). Retrying in 100 milliseconds...")
+                            await asyncio.sleep(0.1)
                         else:
-                            print(f"{Fore.RED}Failed to reserve seat {ticket_id_map[ticket]} (Ticket ID: {ticket}): {data}")
-                            return False
-                    elif response.status_code == 422:
-                        error_data = response.json()
-                        error_msg = error_data.get("error", {}).get("messages", {}).get("error_msg", "")
-                        if "Maximum 4 seats can be booked at a time" in error_msg:
-                            print(f"{Fore.RED}Error: {error_msg}. Stopping further seat reservation.")
-                            stop_reservation_due_to_limit = True
-                            return False
-                        elif "Sorry! this ticket is not available now." in error_msg:
-                            print(f"{Fore.RED}Seat {ticket_id_map[ticket]} (Ticket ID: {ticket}) is not available now. Skipping retry...")
-                            return False
-                    elif response.status_code in [500, 502, 503, 504]:
-                        print(f"{Fore.YELLOW}Server Overloaded (HTTP {response.status_code}). Retrying in 100 milliseconds...")
-                        time.sleep(0.1)
-                    else:
-                        print(f"{Fore.RED}Error: {response.status_code} - {response.text}")
-                        return False
-                except Exception as e:
-                    print(f"{Fore.RED}Exception occurred while reserving seat {ticket_id_map[ticket]} (Ticket ID: {ticket}): {e}")
-                    time.sleep(0.1)
+                            print(f"{Fore.RED}Error: {response.status} - {response.text}")
+                            return "failed"
+                    except AuthenticationError:
+                        raise
+                    except Exception as e:
+                        print(f"{Fore.RED}Exception occurred while reserving seat {ticket_id_map[ticket]} (Ticket ID: {ticket}): {e}")
+                        await asyncio.sleep(0.1)
+        ticket_ids = ticket_ids[:MAX_SEATS_PER_BOOKING]
         print(f"{Fore.YELLOW}Initiating seat reservation process for {len(ticket_ids)} tickets...")
-
-        
-        # with ThreadPoolExecutor(max_workers=len(ticket_ids)) as executor:
-        #     executor.map(reserve_single_seat, ticket_ids)
-
-        for x in ticket_ids:
-            reserve_single_seat(x)
-
-
+        results = await asyncio.gather(*(timed("reserve", reserve_single_seat(ticket), ticket=ticket_id_map[ticket]) for ticket in ticket_ids))
+        for ticket, result in zip(ticket_ids, results):
+            print(f"{Fore.CYAN}  {ticket_id_map[ticket]} (Ticket ID: {ticket}): {result}")
+        successful_ticket_ids = [ticket for ticket, result in zip(ticket_ids, results) if result == "reserved"]
         if successful_ticket_ids:
             ticket_ids = successful_ticket_ids
             print(f"{Fore.GREEN}Successfully reserved tickets {ticket_ids}. Proceeding to next step...")
@@ -363,8 +275,8 @@ def main():
         else:
             print(f"{Fore.RED}No seats could be reserved. Please try again...")
             return False
-    def send_passenger_details():
-        url = "https://railspaapi.shohoz.com/v1.0/app/bookings/passenger-details"
+    async def send_passenger_details():
+        url = f"{API_BASE}/bookings/passenger-details"
         payload = {
             "trip_id": trip_id,
             "trip_route_id": route_id,
@@ -372,9 +284,9 @@ def main():
         }
         while True:
             try:
-                response = requests.post(url, headers=headers, json=payload)
+                response = await client.post(url, json=payload)
                 print(f"{Fore.CYAN}Response from Passenger Details API: {response.text}")
-                if response.status_code == 200:
+                if response.status == 200:
                     data = response.json()
                     if data["data"]["success"]:
                         print(f"{Fore.GREEN}OTP sent successfully!")
@@ -382,248 +294,278 @@ def main():
                     else:
                         print(f"{Fore.RED}Failed to send OTP: {data}")
                         return False  
-                elif response.status_code in [500, 502, 503, 504]:
-                    print(f"{Fore.YELLOW}Server Overloaded (HTTP {response.status_code}). Retrying in 1 second...")
-                    time.sleep(1)  
+                elif response.status in [500, 502, 503, 504]:
+                    print(f"{Fore.YELLOW}Server Overloaded (HTTP {response.status}). Retrying in 1 second...")
+                    await asyncio.sleep(1)  
                 else:
-                    print(f"{Fore.RED}Error: {response.status_code} - {response.text}")
+                    print(f"{Fore.RED}Error: {response.status} - {response.text}")
                     return False  
-            except requests.RequestException as e:
+            except (aiohttp.ClientError, BadResponse) as e:
                 print(f"{Fore.RED}Exception occurred while sending passenger details: {e}")
-                time.sleep(1)  
-    def send_passenger_details():
-        url = "https://railspaapi.shohoz.com/v1.0/app/bookings/passenger-details"
-        payload = {
-            "trip_id": trip_id,
-            "trip_route_id": route_id,
-            "ticket_ids": ticket_ids
-        }
-        while True:
-            try:
-                response = requests.post(url, headers=headers, json=payload)
-                print(f"{Fore.CYAN}Response from Passenger Details API: {response.text}")
-                if response.status_code == 200:
-                    data = response.json()
-                    if data["data"]["success"]:
-                        print(f"{Fore.GREEN}OTP sent successfully!")
-                        return True  
-                    else:
-                        print(f"{Fore.RED}Failed to send OTP: {data}")
-                        return False  
-                elif response.status_code in [500, 502, 503, 504]:
-                    print(f"{Fore.YELLOW}Server Overloaded (HTTP {response.status_code}). Retrying in 1 second...")
-                    time.sleep(1)  
-                else:
-                    print(f"{Fore.RED}Error: {response.status_code} - {response.text}")
-                    return False  
-            except requests.RequestException as e:
-                print(f"{Fore.RED}Exception occurred while sending passenger details: {e}")
-                time.sleep(1)  
-    def prepare_confirm_payload(otp):
-        user_email,user_phone,user_name = extract_user_info(token)
-        if len(ticket_ids) > 1:
-            passenger_names = [user_name]
-            for i in range(1,len(ticket_ids)):
-                passenger_name = input(f"{Fore.YELLOW}Enter passenger {i+1} name :")
-                passenger_names.append(passenger_name)
-            confirm_payload = {
-                "is_bkash_online": True,
-                "boarding_point_id": boarding_id,
-                "from_city": train_booking_info['from_station'],
-                "to_city": train_booking_info['to_station'],
-                "date_of_journey": train_booking_info['journey_date'],
-                "seat_class": train_booking_info['seat_class'],
-                "passengerType": ["Adult"]*len(ticket_ids),
-                "gender": ["male"] * len(ticket_ids),
-                "pname": passenger_names,
-                "pmobile": user_phone,
-                "pemail": user_email,
-                "trip_id": trip_id,
-                "trip_route_id": route_id,
-                "ticket_ids": ticket_ids,
-                "contactperson": 0,
-                "otp": otp,
-                "selected_mobile_transaction": 1
-            }
-        else:
-            confirm_payload = {
-                "is_bkash_online": True,
-                "boarding_point_id": boarding_id,
-                "from_city": train_booking_info['from_station'],
-                "to_city": train_booking_info['to_station'],
-                "date_of_journey": train_booking_info['journey_date'],
-                "seat_class": train_booking_info['seat_class'],
-                "passengerType": ["Adult"],
-                "gender": ["male"],
-                "pname": [user_name],
-                "pmobile": user_phone,
-                "pemail": user_email,
-                "trip_id": trip_id,
-                "trip_route_id": route_id,
-                "ticket_ids": ticket_ids,
-                "contactperson": 0,
-                "otp": otp,
-                "selected_mobile_transaction": 1
-            }
-        return confirm_payload
-    def verify_and_confirm(otp):
-        verify_url = "https://railspaapi.shohoz.com/v1.0/app/bookings/verify-otp"
+                await asyncio.sleep(1)  
+    async def ask_passenger_names():
+        passenger_names = [name.strip() for name in train_booking_info['passenger_names'] or [extract_user_info(client.token)[2]] if name and name.strip()][:len(ticket_ids)]
+        for i in range(len(passenger_names),len(ticket_ids)):
+            passenger_name = await ainput(f"{Fore.YELLOW}Enter passenger {i+1} name :")
+            passenger_names.append(passenger_name)
+        return passenger_names
+    async def choose_payment_method():
+        method = resolve_payment_method(train_booking_info['payment_method'])
+        if not method:
+            print(f"\n{Fore.CYAN}Select Payment Method:")
+            print("\n".join(f"{i}. {PAYMENT_METHODS[key][0]}" for i, key in enumerate(PAYMENT_CHOICES, 1)))
+        while not method:
+            method = resolve_payment_method(await ainput(f"{Fore.YELLOW}Enter the number corresponding to your payment method: "))
+            if not method:
+                print(f"{Fore.RED}Invalid selection! Please enter a number between 1 and {len(PAYMENT_CHOICES)}.")
+        print(f"{Fore.GREEN}Payment Method Selected: {PAYMENT_METHODS[method][0]}")
+        return method
+    def prepare_confirm_payload(passenger_names, payment_method, otp=None):
+        return build_confirm_payload(confirm_template, ticket_ids, passenger_names, payment_method, otp)
+    async def verify_otp(otp):
+        verify_url = f"{API_BASE}/bookings/verify-otp"
         verify_payload = {
             "trip_id": trip_id,
             "trip_route_id": route_id,
             "ticket_ids": ticket_ids,
             "otp": otp
         }
-        try:
-            while True:
-                response = requests.post(verify_url, headers=headers, json=verify_payload)
-                if response.status_code == 200:
-                    data = response.json()
-                    if not data["data"]["success"]:
-                        print(f"{Fore.RED}Failed to verify OTP: {data}")
-                        return False  
-                    print(f"{Fore.GREEN}OTP verified Successfully!")
-                    break  
-                elif response.status_code in [500, 502, 503, 504]:
-                    print(f"{Fore.YELLOW}Server overloaded (HTTP {response.status_code}). Retrying in 1 second...")
-                    time.sleep(1)  
-                elif response.status_code == 422:
-                    data = response.json()
-                    error_info = data.get("error", {}).get("messages", {})
-                    error_message = error_info.get("message", "Unknown error")
-                    error_key = error_info.get("errorKey", "Unknown errorkey")
-                    print(f"{Fore.RED}Error: {error_message} (Error Key: {error_key})")
-                    if error_key == "OtpNotVerified":
-                        otp = input(f"{Fore.YELLOW}The OTP does not match. Please enter correct OTP: ")
-                        verify_payload["otp"] = otp  
-                    else:
-                        print(f"{Fore.RED}Error: {response.status_code} - {response.text}")
-                        return False  
-        except Exception as e:
-            print(f"{Fore.RED}Exception occurred: {e}")
-            time.sleep(1)
-            return False  
-        confirm_url = "https://railspaapi.shohoz.com/v1.0/app/bookings/confirm"
-        confirm_payload = prepare_confirm_payload(otp)
-        print(f"\n{Fore.CYAN}Select Payment Method:")
-        print(f"1. bKash\n2. Nagad\n3. Rocket\n4. Upay\n5. VISA\n6. Mastercard\n7. DBBL Nexus")
-        while True:
-            payment_choice = input(f"{Fore.YELLOW}Enter the number corresponding to your payment method: ")
-            if payment_choice == '1':  
-                print(f"{Fore.GREEN}Payment Method Selected: bKash")
-                break
-            elif payment_choice == '2':  
-                confirm_payload["is_bkash_online"] = False
-                confirm_payload["selected_mobile_transaction"] = 3
-                print(f"{Fore.GREEN}Payment Method Selected: Nagad")
-                break
-            elif payment_choice == '3':  
-                confirm_payload["is_bkash_online"] = False
-                confirm_payload["selected_mobile_transaction"] = 4
-                print(f"{Fore.GREEN}Payment Method Selected: Rocket")
-                break
-            elif payment_choice == '4':  
-                confirm_payload["is_bkash_online"] = False
-                confirm_payload["selected_mobile_transaction"] = 5
-                print(f"{Fore.GREEN}Payment Method Selected: Upay")
-                break
-            elif payment_choice == '5':  
-                confirm_payload["is_bkash_online"] = False
-                confirm_payload.pop("selected_mobile_transaction", None)
-                confirm_payload["pg"] = "visa"
-                print(f"{Fore.GREEN}Payment Method Selected: VISA")
-                break
-            elif payment_choice == '6':  
-                confirm_payload["is_bkash_online"] = False
-                confirm_payload.pop("selected_mobile_transaction", None)
-                confirm_payload["pg"] = "mastercard"
-                print(f"{Fore.GREEN}Payment Method Selected: Mastercard")
-                break
-            elif payment_choice == '7':  
-                confirm_payload["is_bkash_online"] = False
-                confirm_payload.pop("selected_mobile_transaction", None)
-                confirm_payload["pg"] = "nexus"
-                print(f"{Fore.GREEN}Payment Method Selected: DBBL Nexus")
-                break
-            else:
-                print(f"{Fore.RED}Invalid selection! Please enter a number between 1 and 7.")
-        while True:
-            response = requests.patch(confirm_url, headers=headers, json=confirm_payload)
-            print(f"{Fore.CYAN}Response from Confirm Booking API: {response.text}")
+        with timeline.stage("otp_verify"):
             try:
-                if response.status_code == 200:
-                    data = response.json()
-                    if "redirectUrl" in data["data"]:
-                        redirect_url = data["data"]["redirectUrl"]
-                        print(f"\n{Fore.GREEN}{'='*50}")
-                        print(f"{Fore.GREEN}Booking confirmed successfully!")
-                        print(f"{Fore.YELLOW}IMPORTANT: Please note that this payment link can be used ONLY ONCE.")
-                        print(f"{Fore.BLUE}Payment URL: {redirect_url}")
-                        webbrowser.open(redirect_url)
-                        print(f"{Fore.GREEN}{'='*50}\n")
-                        return True  
+                while True:
+                    response = await client.post(verify_url, json=verify_payload)
+                    if response.status == 200:
+                        data = response.json()
+                        if not data["data"]["success"]:
+                            print(f"{Fore.RED}Failed to verify OTP: {data}")
+                            return None
+                        print(f"{Fore.GREEN}OTP verified Successfully!")
+                        break  
+                    elif response.status in [500, 502, 503, 504]:
+                        print(f"{Fore.YELLOW}Server overloaded (HTTP {response.status}). Retrying in 1 second...")
+                        await asyncio.sleep(1)  
+                    elif response.status == 422:
+                        data = response.json()
+                        error_info = data.get("error", {}).get("messages", {})
+                        error_message = error_info.get("message", "Unknown error")
+                        error_key = error_info.get("errorKey", "Unknown errorkey")
+                        print(f"{Fore.RED}Error: {error_message} (Error Key: {error_key})")
+                        if error_key == "OtpNotVerified":
+                            otp = await ainput(f"{Fore.YELLOW}The OTP does not match. Please enter correct OTP: ")
+                            verify_payload["otp"] = otp  
+                        else:
+                            print(f"{Fore.RED}Error: {response.status} - {response.text}")
+                            return None
+            except AuthenticationError:
+                raise
+            except Exception as e:
+                print(f"{Fore.RED}Exception occurred: {e}")
+                await asyncio.sleep(1)
+                return None
+        return otp
+    async def confirm_booking(confirm_payload):
+        confirm_url = f"{API_BASE}/bookings/confirm"
+        with timeline.stage("confirm"):
+            while True:
+                try:
+                    response = await client.patch(confirm_url, json=confirm_payload)
+                    print(f"{Fore.CYAN}Response from Confirm Booking API: {response.text}")
+                    if response.status == 200:
+                        data = response.json()
+                        if "redirectUrl" in data["data"]:
+                            redirect_url = data["data"]["redirectUrl"]
+                            print(f"\n{Fore.GREEN}{'='*50}")
+                            print(f"{Fore.GREEN}Booking confirmed successfully!")
+                            print(f"{Fore.YELLOW}IMPORTANT: Please note that this payment link can be used ONLY ONCE.")
+                            print(f"{Fore.BLUE}Payment URL: {redirect_url}")
+                            webbrowser.open(redirect_url)
+                            print(f"{Fore.GREEN}{'='*50}\n")
+                            return True  
+                        else:
+                            print(f"{Fore.RED}Failed to confirm booking: {data}")
+                            return False  
+                    elif response.status in [500, 502, 503, 504]:
+                        print(f"{Fore.YELLOW}Server overloaded (HTTP {response.status}). Retrying in 1 second...")
+                        await asyncio.sleep(1)  
                     else:
-                        print(f"{Fore.RED}Failed to confirm booking: {data}")
+                        print(f"{Fore.RED}Error: {response.status} - {response.text}")
                         return False  
-                elif response.status_code in [500, 502, 503, 504]:
-                    print(f"{Fore.YELLOW}Server overloaded (HTTP {response.status_code}). Retrying in 1 second...")
-                    time.sleep(1)  
-                else:
-                    print(f"{Fore.RED}Error: {response.status_code} - {response.text}")
+                except (aiohttp.ClientError, BadResponse) as e:
+                    print(f"{Fore.RED}Exception occurred while confirming booking: {e}")
+                    await asyncio.sleep(1)
                     return False  
-            except requests.RequestException as e:
-                print(f"{Fore.RED}Exception occurred while confirming booking: {e}")
-                time.sleep(1)
-                return False  
     try:
-        if not token:
+        if not client.token:
             print(f"{Fore.RED}Failed to fetch auth token. Exiting...")
             sys.exit(1)
-        trip_id, route_id, boarding_id, train_name = fetch_trip_details(
-            train_booking_info.get('from_station', ''),
-            train_booking_info.get('to_station', ''),
-            train_booking_info.get('journey_date', ''),
-            train_booking_info.get('seat_class', ''),
-            train_booking_info.get('train_number', '')
-        )
-        if not all([trip_id, route_id, boarding_id]):
-            print(f"{Fore.RED}Error: Could not fetch trip details. Please check your inputs.")
-            sys.exit(1)
-        if  asyncio.run(reserve_seat()):  
-            if send_passenger_details():
-                print(f"{Fore.CYAN}Proceeding to OTP verification and confirmation...")
-                otp = input(f"{Fore.YELLOW}Enter OTP received: ")
-                if verify_and_confirm(otp):
-                    print(f"{Fore.GREEN}Booking Process completed Successfully!")
-                    return True
-                else:
-                    print(f"{Fore.RED}Failed to complete booking process.")
+        journey = tuple(train_booking_info.get(key, '') for key in ['from_station', 'to_station', 'journey_date', 'seat_class', 'train_number'])
+        if not state.reached(Stage.TRIP_RESOLVED):
+            cached_trip = trip_cache.get(journey)
+            if cached_trip:
+                trip_id, route_id, boarding_id, train_name = cached_trip
+                print(f"{Fore.GREEN}Using cached trip details. Train: {train_name}, Trip ID: {trip_id}, Route ID: {route_id}, Boarding Point ID: {boarding_id}")
             else:
+                trip_id, route_id, boarding_id, train_name = await timed("trip_search", fetch_trip_details(*journey))
+                if not all([trip_id, route_id, boarding_id]):
+                    print(f"{Fore.RED}Error: Could not fetch trip details. Please check your inputs.")
+                    sys.exit(1)
+                trip_cache.put(journey, trip_id, route_id, boarding_id, train_name)
+            user_email, user_phone, _ = extract_user_info(client.token)
+            state.advance(Stage.TRIP_RESOLVED, trip=(trip_id, route_id, boarding_id, train_name),
+                          confirm_template=compile_confirm_template(train_booking_info, trip_id, route_id, boarding_id, user_email, user_phone))
+        trip_id, route_id, boarding_id, train_name = state.trip
+        confirm_template = state.confirm_template
+        if state.reached(until):
+            return True
+        if not state.reached(Stage.LAYOUT_FETCHED):
+            print(f"{Fore.YELLOW}Waiting for seat layout availability...")
+            seat_layout = await timed("layout_poll", is_booking_available())
+            if not seat_layout:
+                print(f"{Fore.RED}Seat layout could not be retrieved.")
+                return state.fail(Stage.AUTHENTICATED)
+            state.advance(Stage.LAYOUT_FETCHED, seat_layout=seat_layout)
+        if not state.reached(Stage.SEATS_RESERVED):
+            if not await reserve_seat(state.seat_layout):
+                print(f"{Fore.RED}Failed to reserve the seat.")
+                return state.fail(Stage.TRIP_RESOLVED, backoff=False)
+            state.advance(Stage.SEATS_RESERVED, ticket_ids=ticket_ids)
+        ticket_ids = state.ticket_ids
+        if not state.reached(Stage.DETAILS_SENT):
+            otp_request = asyncio.create_task(timed("passenger_details", send_passenger_details()))
+            passenger_names = await timed("passenger_prompt", ask_passenger_names())
+            if state.payment_method is None:
+                state.payment_method = await timed("payment_prompt", choose_payment_method())
+            if not await otp_request:
                 print(f"{Fore.RED}Failed to send passenger details and get OTP.")
-        else:
-            print(f"{Fore.RED}Failed to reserve the seat.")
+                return state.fail(Stage.TRIP_RESOLVED)
+            state.advance(Stage.DETAILS_SENT, passenger_names=passenger_names,
+                          confirm_payload=prepare_confirm_payload(passenger_names, state.payment_method))
+        if not state.reached(Stage.OTP_VERIFIED):
+            print(f"{Fore.CYAN}Proceeding to OTP verification and confirmation...")
+            otp = await timed("otp_prompt", ainput(f"{Fore.YELLOW}Enter OTP received: "))
+            otp = await verify_otp(otp)
+            if not otp:
+                print(f"{Fore.RED}Failed to verify the OTP.")
+                return state.fail(Stage.SEATS_RESERVED)
+            state.advance(Stage.OTP_VERIFIED, otp=otp)
+        state.confirm_payload["otp"] = state.otp
+        if not await confirm_booking(state.confirm_payload):
+            print(f"{Fore.RED}Failed to complete booking process.")
+            return state.fail(Stage.SEATS_RESERVED)
+        state.advance(Stage.CONFIRMED)
+        print(f"{Fore.GREEN}Booking Process completed Successfully!")
+        return True
+    except AuthenticationError as e:
+        print(f"{Fore.RED}{e}. Please check your mobile number and password.")
+        sys.exit(1)
     except KeyError as e:
         print(f"{Fore.RED}Missing key in train_booking_info: {e}")
         sys.exit(1)
     except Exception as e:
         print(f"{Fore.RED}An unexpected error occurred: {e}")
         sys.exit(1)
-def countdown():
-    from datetime import datetime, time as dt_time
-    target_time = dt_time(7, 59, 30)
-    def is_before_target_time():
-        current_time = datetime.now().time()
-        return current_time < target_time
-    while is_before_target_time():
-        os.system('cls' if os.name == 'nt' else 'clear')  
-        current_time = datetime.now().time()
-        time_left = datetime.combine(datetime.today(), target_time) - datetime.combine(datetime.today(), current_time)
-        hours, remainder = divmod(time_left.seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        print(f"Time left: {hours:02}:{minutes:02}:{seconds:02}\nCurrent Time :{datetime.now().strftime("%I:%M:%S %p")}")
-        time.sleep(1)
-# countdown()
-while True:
-    os.system('cls' if os.name == 'nt' else 'clear')
-    if(main()):
-        break
+timeline = BookingTimeline()
+token_cache = TokenCache(API_BASE)
+trip_cache = TripCache(API_BASE)
+seat_selector = IncrementalSelector()
+server_clock = ServerClock()
+recorder = TrafficRecorder(os.getenv("SHOHOZ_RECORD")) if os.getenv("SHOHOZ_RECORD") else None
+async def sync_clock(client, samples=5, spacing=0.23):
+    for _ in range(samples):
+        try:
+            await client.get(API_BASE)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"{Fore.YELLOW}Clock sync request failed: {e}")
+        await asyncio.sleep(spacing)
+async def sleep_warm(client, wake_at, lead=WARM_UP_LEAD):
+    await server_clock.sleep_until(wake_at - lead)
+    delay = wake_at - server_clock.now()
+    if delay > 0:
+        await timed("warm_up", client.keep_warm(API_BASE, delay, MAX_SEATS_PER_BOOKING))
+async def countdown(client, start_at, resync_every=300):
+    hours, minutes, seconds = (int(part) for part in (start_at.split(":") + ["0"])[:3])
+    with timeline.stage("clock_sync"):
+        await sync_clock(client)
+    now = server_clock.now()
+    day = time.localtime(now)
+    target_time = time.mktime((day.tm_year, day.tm_mon, day.tm_mday, hours, minutes, seconds, 0, 0, -1))
+    if server_clock.uncertainty is not None:
+        print(f"{Fore.CYAN}Server clock offset: {server_clock.offset:+.3f}s (±{server_clock.uncertainty:.3f}s)")
+    next_sync = now + resync_every
+    warmer = None
+    while (time_left := target_time - server_clock.now()) > 0:
+        if warmer is None and time_left <= WARM_UP_LEAD:
+            print(f"\n{Fore.CYAN}Warming up {MAX_SEATS_PER_BOOKING} connections...")
+            warmer = asyncio.create_task(timed("warm_up", client.keep_warm(API_BASE, time_left, MAX_SEATS_PER_BOOKING)))
+        if server_clock.now() >= next_sync and time_left > 30:
+            await sync_clock(client)
+            next_sync = server_clock.now() + resync_every
+            continue
+        hours_left, remainder = divmod(int(time_left), 3600)
+        minutes_left, seconds_left = divmod(remainder, 60)
+        current_time = time.strftime('%I:%M:%S %p', time.localtime(server_clock.now()))
+        print(f"\rTime left: {hours_left:02}:{minutes_left:02}:{seconds_left:02}  Server time: {current_time}", end="", flush=True)
+        await server_clock.sleep_until(min(target_time, int(server_clock.now()) + 1))
+    print()
+    if warmer:
+        await warmer
+async def sign_in(client):
+    mobile_number = train_booking_info.get('mobile_number', '')
+    token = await timed("auth", auth_token(client, mobile_number, train_booking_info.get('password', '')))
+    if token:
+        client.set_token(token)
+        token_cache.put(mobile_number, token)
+        extract_user_info(token)
+    return token
+async def renew_sign_in(client):
+    print(Fore.YELLOW + "Auth token was rejected. Signing in again...")
+    token_cache.invalidate(train_booking_info.get('mobile_number', ''))
+    return await sign_in(client)
+async def keep_token_fresh(client, min_interval=30):
+    while True:
+        await asyncio.sleep(max(min_interval, token_cache.refresh_at(client.token) - server_clock.now()))
+        print(f"{Fore.CYAN}Auth token is close to expiry. Refreshing in the background...")
+        if not await sign_in(client):
+            await asyncio.sleep(30)
+async def run():
+    try:
+        async with ShohozClient(timeline=timeline, clock=server_clock, recorder=recorder, reauthenticate=renew_sign_in) as client:
+            token = token_cache.get(train_booking_info.get('mobile_number', ''))
+            if token:
+                print(f"{Fore.GREEN}Using cached auth token.")
+                client.set_token(token)
+                extract_user_info(token)
+            elif not await sign_in(client):
+                print(f"{Fore.RED}Could not sign in. Please check your mobile number and password.")
+                return
+            state = BookingState()
+            state.advance(Stage.AUTHENTICATED)
+            token_refresher = asyncio.create_task(keep_token_fresh(client))
+            try:
+                os.system('cls' if os.name == 'nt' else 'clear')
+                if train_booking_info.get('start_at'):
+                    # Sign-in and the trip lookup are done by the time the window opens; only the layout poll is left.
+                    trip_lookup = asyncio.create_task(main(client, state, until=Stage.TRIP_RESOLVED))
+                    await countdown(client, train_booking_info['start_at'])
+                    await trip_lookup
+                retries = PollScheduler(backoff_base=1.0, backoff_cap=30.0)
+                peak = state.peak
+                while not await main(client, state):
+                    if state.peak > peak:
+                        peak, retries.failures = state.peak, 0
+                    stage = Stage(state.stage + 1).name.lower().replace('_', ' ')
+                    if not state.backoff:
+                        print(f"{Fore.YELLOW}Retrying from stage: {stage}")
+                        continue
+                    delay = 1.0 + retries.backoff_delay()
+                    print(f"{Fore.YELLOW}Retrying from stage: {stage} in {delay:.1f} seconds...")
+                    await asyncio.sleep(delay)
+            finally:
+                if token_refresher:
+                    token_refresher.cancel()
+    finally:
+        if recorder:
+            recorder.close()
+            print(f"{Fore.CYAN}Traffic recorded to {recorder.path}")
+        timeline.report(os.getenv("BOOKING_TIMELINE", "booking_timeline.json"))
+asyncio.run(run())
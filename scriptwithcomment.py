@@ -4,6 +4,7 @@ import os, sys, time, re, ssl
 # Third-party libraries
 import jwt, requests, aiohttp, asyncio, certifi  
 from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dotenv import load_dotenv
 from colorama import Fore, init  
 
@@ -103,9 +104,11 @@ def auth_token(num, passcode, max_retries=50):
     return None
 
 
+@lru_cache(maxsize=4)  # Decode each token only once; later calls return the cached claims
 def extract_user_info(auth_key):
     """
     Extract user information (email, phone number, and name) from a JWT (JSON Web Token).
+    Results are memoized per token, so calling this on the confirm path costs nothing.
 
     Args:
         auth_key (str): The JWT token to decode.
@@ -816,7 +819,17 @@ def send_passenger_details():
 
 
 
-def prepare_confirm_payload(otp):
+def prepare_confirm_payload(otp=None):
+    """
+    Build the booking confirmation payload. Called before the OTP prompt so that,
+    once the OTP is verified, confirmation only needs to fill in the OTP and send.
+
+    Args:
+        otp (str): The OTP, if already known. Filled in later by verify_and_confirm otherwise.
+
+    Returns:
+        dict: The confirmation payload.
+    """
     user_email,user_phone,user_name = extract_user_info(token)
     if len(ticket_ids) > 1:
         passenger_names = [user_name]
@@ -869,13 +882,14 @@ def prepare_confirm_payload(otp):
 
 
 
-def verify_and_confirm(otp):
+def verify_and_confirm(otp, confirm_payload):
     """
     Verifies the OTP and confirms the booking by selecting a payment method.
     This function handles OTP verification, payment method selection, and booking confirmation.
 
     Args:
         otp (str): The OTP entered by the user.
+        confirm_payload (dict): The confirmation payload built by prepare_confirm_payload.
 
     Returns:
         bool: True if the booking is confirmed successfully, otherwise False.
@@ -938,8 +952,8 @@ def verify_and_confirm(otp):
 
     # Booking Confirmation URL
     confirm_url = "https://railspaapi.shohoz.com/v1.0/app/bookings/confirm"
-    # Prepare the payload for booking confirmation
-    confirm_payload = prepare_confirm_payload(otp)
+    # Fill the verified OTP into the pre-built confirmation payload
+    confirm_payload["otp"] = otp
 
     # Payment Method Selection
     print(f"\n{Fore.CYAN}Select Payment Method:")
@@ -1040,6 +1054,9 @@ try:
 
     headers = {"Authorization": f"Bearer {token}"}
 
+    # Decode the user claims once, right after sign-in
+    extract_user_info(token)
+
     trip_id, route_id, boarding_id, train_name = fetch_trip_details(
         train_booking_info.get('from_station', ''),
         train_booking_info.get('to_station', ''),
@@ -1055,9 +1072,12 @@ try:
     if  asyncio.run(reserve_seat()):  # Remove 'await' if the function is synchronous
         if send_passenger_details():
             print(f"{Fore.CYAN}Proceeding to OTP verification and confirmation...")
-            
+
+            # Build the confirmation payload (and ask passenger names) before the OTP arrives
+            confirm_payload = prepare_confirm_payload()
+
             otp = input(f"{Fore.YELLOW}Enter OTP received: ")
-            if verify_and_confirm(otp):
+            if verify_and_confirm(otp, confirm_payload):
                 print(f"{Fore.GREEN}Booking Process completed Successfully!")
             else:
                 print(f"{Fore.RED}Failed to complete booking process.")
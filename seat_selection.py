@@ -0,0 +1,366 @@
+from array import array
+from itertools import chain, compress, repeat
+from operator import attrgetter, itemgetter
+
+
+def seat_no(seat_number):
+    """
+    Parse the numeric part of a seat label such as "KA-12".
+
+    Args:
+        seat_number (str): The seat label from the seat layout.
+
+    Returns:
+        int: The seat number within its coach, or -1 if the label has no number.
+    """
+    try:
+        return int(seat_number[seat_number.rfind('-') + 1:])
+    except ValueError:
+        return -1
+
+
+# bytes.translate table: seat_availability 1 -> 1, any other byte value -> 0
+AVAILABLE = bytes([0, 1] + [0] * 254)
+
+
+class Coach:
+    """
+    One coach of a seat layout as parallel arrays, in layout order.
+
+    Holds every seat, sold or not: seat labels, ticket IDs (a signed 64-bit
+    array, or a tuple when the layout has IDs that are not ints) and one
+    availability byte per seat. A few bytes per seat instead of
+    a dict per seat, which matters when many trips are watched or earlier
+    polls are kept.
+    """
+
+    __slots__ = ("name", "labels", "ticket_ids", "available")
+
+    def __init__(self, name, labels, ticket_ids, available):
+        self.name = name
+        self.labels = labels            # tuple of seat labels
+        self.ticket_ids = ticket_ids    # array('q') (a tuple if some IDs are not ints), parallel to labels
+        self.available = available      # bytearray, 1 where the seat can be booked
+
+    @classmethod
+    def from_layout(cls, coach):
+        """
+        Build a coach from one entry of `seatLayout`.
+
+        Args:
+            coach (dict or payloads.Coach): The coach as a plain dict or as the
+                struct decoded by payloads.decode_seat_layout.
+        """
+        if isinstance(coach, dict):
+            name, seats, get = coach.get('floor_name'), list(chain.from_iterable(coach['layout'])), itemgetter
+        else:
+            name, seats, get = coach.floor_name, list(chain.from_iterable(coach.layout)), attrgetter
+        availability = list(map(get('seat_availability'), seats))
+        try:
+            available = bytearray(bytes(availability).translate(AVAILABLE))
+        except (TypeError, ValueError):
+            available = bytearray(map((1).__eq__, availability))
+        ticket_ids = list(map(get('ticket_id'), seats))
+        try:
+            ticket_ids = array('q', ticket_ids)
+        except (TypeError, OverflowError):
+            ticket_ids = tuple(ticket_ids)
+        return cls(name, tuple(map(get('seat_number'), seats)), ticket_ids, available)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def same_seats(self, other):
+        """True if `other` has the same seats, ticket IDs and availability."""
+        return self.available == other.available and self.labels == other.labels and self.ticket_ids == other.ticket_ids
+
+    def available_seats(self):
+        """
+        Returns:
+            tuple: (labels, ticket IDs) of the available seats, as parallel lists.
+        """
+        return list(compress(self.labels, self.available)), list(compress(self.ticket_ids, self.available))
+
+
+class SeatMap:
+    """
+    A whole seat layout as a list of compact Coach objects.
+
+    Args:
+        coaches (list): Coach objects, in layout order.
+    """
+
+    __slots__ = ("coaches",)
+
+    def __init__(self, coaches):
+        self.coaches = coaches
+
+    @classmethod
+    def from_layout(cls, seat_layout):
+        """Build a seat map from the `seatLayout` payload (dicts or payloads structs)."""
+        return cls([Coach.from_layout(coach) for coach in seat_layout])
+
+    def __len__(self):
+        return len(self.coaches)
+
+    def __iter__(self):
+        return iter(self.coaches)
+
+
+def as_seat_map(seat_layout):
+    return seat_layout if isinstance(seat_layout, SeatMap) else SeatMap.from_layout(seat_layout)
+
+
+class SeatIndex:
+    """
+    Index of the available seats in a seat layout, built in one pass.
+
+    Every coach keeps its available seat labels and ticket IDs in layout order,
+    and `positions` maps a seat label to its coach and slot, so each selection
+    strategy looks seats up instead of walking the whole layout again. Seat
+    numbers are parsed per coach, once, the first time a strategy needs the
+    coach in numeric order; `positions` is likewise only built once a strategy
+    looks a seat up by label. Coach indexes follow the layout, so a later poll
+    of the same trip can be applied with `update`.
+
+    Args:
+        seat_layout (SeatMap or list): The seat map, or the seat layout data from
+            the API (dicts or payloads structs) to build one from.
+    """
+
+    def __init__(self, seat_layout):
+        self.seat_map = as_seat_map(seat_layout)
+        self.coach_names = []
+        self.labels = []       # per coach: available seat labels in layout order
+        self.ticket_ids = []   # per coach: ticket IDs, parallel to labels
+        self._positions = None # seat label -> (coach index, slot), built lazily
+        self._ordered = []     # per coach: (sorted seat numbers, matching slots), built lazily
+        for coach in self.seat_map:
+            labels, ticket_ids = coach.available_seats()
+            self.coach_names.append(coach.name)
+            self.labels.append(labels)
+            self.ticket_ids.append(ticket_ids)
+            self._ordered.append(None)
+
+    @property
+    def positions(self):
+        if self._positions is None:
+            self._positions = {}
+            for coach_index, labels in enumerate(self.labels):
+                self._positions.update(zip(labels, zip(repeat(coach_index), range(len(labels)))))
+        return self._positions
+
+    def update(self, seat_layout):
+        """
+        Apply a newer layout of the same trip, re-indexing only the coaches that changed.
+
+        Args:
+            seat_layout (SeatMap or list): The newer seat map or seat layout.
+
+        Returns:
+            set: Seat labels whose availability changed, or None if the coaches
+                 or their ticket IDs differ and the index could not be updated in place.
+        """
+        seat_map = as_seat_map(seat_layout)
+        if len(seat_map) != len(self.seat_map):
+            return None
+        changed = set()
+        for coach_index, (coach, old_coach) in enumerate(zip(seat_map, self.seat_map)):
+            if coach.same_seats(old_coach):
+                continue
+            if coach.name != old_coach.name or coach.ticket_ids != old_coach.ticket_ids:
+                return None
+            labels, ticket_ids = coach.available_seats()
+            old_labels = self.labels[coach_index]
+            changed.update(set(old_labels).symmetric_difference(labels))
+            self.labels[coach_index] = labels
+            self.ticket_ids[coach_index] = ticket_ids
+            self._ordered[coach_index] = None
+            if self._positions is not None:
+                for label in old_labels:
+                    del self._positions[label]
+                self._positions.update(zip(labels, zip(repeat(coach_index), range(len(labels)))))
+        self.seat_map = seat_map
+        return changed
+
+    def __len__(self):
+        return sum(map(len, self.labels))
+
+    def ordered(self, coach_index):
+        """
+        Seats of one coach in seat-number order.
+
+        Returns:
+            tuple: (sorted seat numbers, slots into `labels`/`ticket_ids` in the same order).
+        """
+        ordered = self._ordered[coach_index]
+        if ordered is None:
+            numbers = [seat_no(label) for label in self.labels[coach_index]]
+            slots = sorted(range(len(numbers)), key=numbers.__getitem__)
+            ordered = self._ordered[coach_index] = ([numbers[slot] for slot in slots], slots)
+        return ordered
+
+
+class SeatSelection:
+    """
+    Seats picked so far, as ticket ID -> seat label, with O(1) membership checks.
+
+    Args:
+        index (SeatIndex): The index to pick seats from.
+        max_seat (int): The number of seats wanted.
+    """
+
+    def __init__(self, index, max_seat):
+        self.index = index
+        self.max_seat = max_seat
+        self.selected = {}
+        self.taken = set()
+
+    def full(self):
+        return len(self.selected) >= self.max_seat
+
+    def take(self, coach_index, slot):
+        """Pick one seat; returns True once `max_seat` seats are selected."""
+        label = self.index.labels[coach_index][slot]
+        if label not in self.taken:
+            self.taken.add(label)
+            self.selected[self.index.ticket_ids[coach_index][slot]] = label
+        return self.full()
+
+    def desired(self, desired_seats):
+        """Pick the desired seats that are still available."""
+        for label in desired_seats:
+            position = self.index.positions.get(label)
+            if position and self.take(*position):
+                return True
+        return self.full()
+
+    def nearby(self, desired_seats):
+        """Pick seats closest to each desired seat, alternating right and left."""
+        for label in desired_seats:
+            position = self.index.positions.get(label)
+            if not position:
+                continue
+            coach_index, slot = position
+            size = len(self.index.labels[coach_index])
+            for offset in range(1, size):
+                if slot + offset < size and self.take(coach_index, slot + offset):
+                    return True
+                if slot - offset >= 0 and self.take(coach_index, slot - offset):
+                    return True
+        return self.full()
+
+    def middle_block(self):
+        """Pick a block of consecutive seat numbers around the middle of a coach."""
+        max_seat = self.max_seat - len(self.selected)
+        for coach_index in range(len(self.index.labels)):
+            numbers, slots = self.index.ordered(coach_index)
+            mid_index = len(numbers) // 2
+            for i in range(max(0, mid_index - max_seat), min(mid_index + 1, len(numbers) - max_seat + 1)):
+                if numbers[i + max_seat - 1] - numbers[i] == max_seat - 1:
+                    for slot in slots[i:i + max_seat]:
+                        self.take(coach_index, slot)
+                    return self.full()
+        return self.full()
+
+    def middle_out(self):
+        """Pick seats outward from the middle of each coach."""
+        for coach_index in range(len(self.index.labels)):
+            _, slots = self.index.ordered(coach_index)
+            right = len(slots) // 2
+            left = right - 1
+            while left >= 0 or right < len(slots):
+                if left >= 0 and self.take(coach_index, slots[left]):
+                    return True
+                if right < len(slots) and self.take(coach_index, slots[right]):
+                    return True
+                left -= 1
+                right += 1
+        return self.full()
+
+    def fill(self):
+        """Pick any remaining available seats in coach order."""
+        for coach_index, labels in enumerate(self.index.labels):
+            for slot in range(len(labels)):
+                if self.take(coach_index, slot):
+                    return True
+        return self.full()
+
+
+def select_seats(seat_layout, desired_seats, max_seat):
+    """
+    Select seats from the seat layout.
+
+    With desired seats: exact matches first, then the closest seats to them,
+    then any remaining seat. Without: a consecutive block around the middle
+    of a coach, then seats outward from the middle, then any remaining seat.
+
+    Args:
+        seat_layout (list, SeatMap or SeatIndex): The seat layout data from the API, its seat map,
+            or an index built from it.
+        desired_seats (list): A list of desired seat labels (may be empty).
+        max_seat (int): The maximum number of seats to select.
+
+    Returns:
+        dict: A dictionary of selected seats with ticket IDs as keys and seat labels as values.
+    """
+    index = seat_layout if isinstance(seat_layout, SeatIndex) else SeatIndex(seat_layout)
+    selection = SeatSelection(index, max_seat)
+    if max_seat <= 0:
+        return selection.selected
+    if desired_seats:
+        selection.desired(desired_seats) or selection.nearby(desired_seats) or selection.fill()
+    else:
+        selection.middle_block() or selection.middle_out() or selection.fill()
+    return selection.selected
+
+
+class IncrementalSelector:
+    """
+    Seat selection that carries over from one seat-layout poll to the next.
+
+    The first layout is indexed and selected from in full. Later layouts of the
+    same trip are diffed into the existing index, and the seats are only picked
+    again when a seat that was picked, a desired seat, or a seat within `radius`
+    seat numbers of either, changed availability. Otherwise the previous picks,
+    all still available, are returned as they are.
+
+    Args:
+        radius (int): How many seat numbers around a picked or desired seat count as nearby.
+    """
+
+    def __init__(self, radius=2):
+        self.radius = radius
+        self.index = None
+        self.selected = {}
+        self._request = None
+
+    def _watched(self, desired_seats):
+        watched = {}
+        for label in list(self.selected.values()) + list(desired_seats or []):
+            watched.setdefault(label[:label.rfind('-')], []).append(seat_no(label))
+        return watched
+
+    def _affected(self, changed, desired_seats):
+        watched = self._watched(desired_seats)
+        for label in changed:
+            numbers = watched.get(label[:label.rfind('-')])
+            if numbers:
+                number = seat_no(label)
+                if any(abs(number - n) <= self.radius for n in numbers):
+                    return True
+        return False
+
+    def select(self, seat_layout, desired_seats, max_seat):
+        """
+        Select seats from the latest seat layout, same arguments and result as select_seats.
+        """
+        request = (tuple(desired_seats or ()), max_seat)
+        seat_map = as_seat_map(seat_layout)
+        changed = self.index.update(seat_map) if self.index is not None else None
+        if changed is None:
+            self.index = SeatIndex(seat_map)
+        if changed is None or request != self._request or (changed and len(self.selected) < max_seat) or self._affected(changed, desired_seats):
+            self.selected = select_seats(self.index, desired_seats, max_seat)
+            self._request = request
+        return dict(self.selected)
@@ -0,0 +1,198 @@
+import os, ssl, time, asyncio
+import certifi, aiohttp
+
+from payloads import loads, BadResponse, DECODE_ERRORS
+
+
+API_BASE = os.getenv("SHOHOZ_API_BASE", "https://railspaapi.shohoz.com/v1.0/app")
+
+
+class ApiResponse:
+    """Body and status of a finished request, read while the connection was held."""
+
+    __slots__ = ("status", "text", "headers")
+
+    def __init__(self, status, text, headers):
+        self.status = status
+        self.text = text
+        self.headers = headers
+
+    def json(self):
+        """
+        Raises:
+            BadResponse: If the body is not JSON.
+        """
+        try:
+            return loads(self.text)
+        except DECODE_ERRORS as e:
+            raise BadResponse(f"Response is not JSON: {self.text[:80]!r}") from e
+
+
+class AuthenticationError(Exception):
+    """The server rejected the auth token and signing in again did not produce a new one."""
+
+
+class ShohozClient:
+    """
+    One HTTP client shared by every booking step.
+
+    Wraps a single keep-alive aiohttp session on the certifi SSL context and
+    carries the bearer header, so each step reuses an open connection instead
+    of paying a fresh TCP+TLS handshake. Use it as an `async with` block on
+    the event loop that runs the whole booking flow.
+
+    Args:
+        pool_size (int): Maximum number of keep-alive connections kept per host.
+        timeline (BookingTimeline): Optional recorder for per-request timings.
+        clock (ServerClock): Optional clock fed with the `Date` header of every response.
+        recorder (TrafficRecorder): Optional log of every request and response.
+        reauthenticate (callable): Optional coroutine function called with the client
+            when a request is answered with 401; it should sign in again and return
+            the new token, or None if that failed.
+    """
+
+    def __init__(self, pool_size=8, timeline=None, clock=None, recorder=None, reauthenticate=None):
+        self.pool_size = pool_size
+        self.timeline = timeline
+        self.clock = clock
+        self.recorder = recorder
+        self.reauthenticate = reauthenticate
+        self._auth_lock = asyncio.Lock()
+        self._unrenewable = None
+        self.ssl_context = ssl.create_default_context(cafile=certifi.where())
+        self.headers = {}
+        self.token = None
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            ssl=self.ssl_context,
+            limit_per_host=self.pool_size,
+            keepalive_timeout=60,
+            ttl_dns_cache=300,
+        )
+        trace_configs = [self.timeline.trace_config()] if self.timeline else None
+        self.session = aiohttp.ClientSession(connector=connector, headers=self.headers, trace_configs=trace_configs)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def set_token(self, token):
+        """Attach the bearer token to every subsequent request."""
+        self.token = token
+        self.headers["Authorization"] = f"Bearer {token}"
+        if self.session is not None:
+            self.session.headers["Authorization"] = self.headers["Authorization"]
+
+    def _observe_date(self, response, sent):
+        if self.clock is not None and "Date" in response.headers:
+            self.clock.observe(response.headers["Date"], sent, time.time())
+
+    async def request(self, method, url, renew_auth=True, **kwargs):
+        """
+        Send a request and read its body.
+
+        A 401 answer makes the client sign in again through `reauthenticate` and
+        repeat the request once. Pass renew_auth=False for the sign-in request itself.
+
+        Raises:
+            AuthenticationError: If the request got a 401 and signing in again failed.
+        """
+        token = self.token
+        response = await self._request(method, url, **kwargs)
+        if response.status != 401 or not renew_auth or self.reauthenticate is None:
+            return response
+        if not await self._renew_token(token):
+            raise AuthenticationError(f"{method} {url} was rejected with 401 and signing in again failed")
+        return await self._request(method, url, **kwargs)
+
+    async def _renew_token(self, rejected):
+        """
+        Sign in again, once for all concurrent requests that were sent with the `rejected` token.
+
+        If that fails, the other requests holding the same token fail without another attempt.
+        """
+        async with self._auth_lock:
+            if self.token and self.token != rejected:
+                return True
+            if rejected == self._unrenewable:
+                return False
+            if await self.reauthenticate(self):
+                return True
+            self._unrenewable = rejected
+            return False
+
+    async def _request(self, method, url, **kwargs):
+        if self.recorder is None:
+            return await self._send(method, url, **kwargs)
+        started = time.perf_counter()
+        try:
+            response = await self._send(method, url, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.recorder.record(method, url, kwargs, started, error=str(e) or type(e).__name__)
+            raise
+        self.recorder.record(method, url, kwargs, started, response)
+        return response
+
+    async def _send(self, method, url, **kwargs):
+        sent = time.time()
+        if self.timeline is None:
+            async with self.session.request(method, url, **kwargs) as response:
+                self._observe_date(response, sent)
+                text = await response.text()
+                return ApiResponse(response.status, text, response.headers)
+        record = self.timeline.request_started(method, url)
+        try:
+            async with self.session.request(method, url, trace_request_ctx=record, **kwargs) as response:
+                self._observe_date(response, sent)
+                text = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.timeline.request_finished(record, error=str(e) or type(e).__name__)
+            raise
+        self.timeline.request_finished(record, status=response.status)
+        return ApiResponse(response.status, text, response.headers)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def patch(self, url, **kwargs):
+        return await self.request("PATCH", url, **kwargs)
+
+    async def warm_up(self, url, connections=4):
+        """
+        Open `connections` keep-alive connections to the host of `url`.
+
+        The requests go out concurrently so that each needs its own connection;
+        they resolve (and cache) DNS and pay the TCP+TLS handshakes up front, and
+        the connections stay in the pool for the next real requests.
+
+        Returns:
+            int: How many of the warm-up requests got a response.
+        """
+        results = await asyncio.gather(*(self.get(url, renew_auth=False) for _ in range(connections)), return_exceptions=True)
+        return sum(not isinstance(result, BaseException) for result in results)
+
+    async def keep_warm(self, url, duration, connections=4, interval=15):
+        """
+        Sleep for `duration` seconds while re-running warm_up every `interval`
+        seconds, so idle connections are not closed by either side.
+
+        No round is started in the last second, so the connections are idle and
+        in the pool when the caller's real requests start. Cancelling the task
+        while a round is in flight would close those connections instead.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration
+        while deadline - loop.time() > 1:
+            await self.warm_up(url, connections)
+            await asyncio.sleep(max(0, min(interval, deadline - loop.time())))
+        await asyncio.sleep(max(0, deadline - loop.time()))
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
@@ -0,0 +1,102 @@
+"""
+Checks for the seat-selection strategies in seat_selection.py.
+
+Each strategy is pinned on a small hand-made layout, and compared with the
+legacy pickers in scriptwithcomment.py on synthetic layouts wherever the two
+are meant to agree. They deliberately differ in two places: nearby seats are
+searched across the whole coach (alternating right and left) instead of within
+the desired seat's row, and only one block of consecutive seats is picked
+instead of every block found.
+
+    python -m pytest test_seat_selection.py
+"""
+import random
+
+import pytest
+
+from bench_seat_selection import make_seat_layout, load_legacy_pickers
+from seat_selection import select_seats, seat_no
+
+
+def coach(name, availability, seats_per_row=4, first_ticket_id=1000):
+    """A seatLayout coach from a string of 1 (available) / 0 (sold) flags, numbered from 1."""
+    seats = [{"ticket_id": first_ticket_id + number, "seat_number": f"{name}-{number}", "seat_availability": int(flag)}
+             for number, flag in enumerate(availability, 1)]
+    return {"floor_name": name, "layout": [seats[i:i + seats_per_row] for i in range(0, len(seats), seats_per_row)]}
+
+
+def labels(selected):
+    return sorted(selected.values(), key=lambda label: (label.split("-")[0], seat_no(label)))
+
+
+@pytest.fixture(scope="module")
+def legacy():
+    return load_legacy_pickers()
+
+
+def available_labels(seat_layout):
+    return [seat["seat_number"] for c in seat_layout for row in c["layout"] for seat in row if seat["seat_availability"] == 1]
+
+
+def test_desired_seats_are_picked_exactly():
+    layout = [coach("KA", "11111111")]
+    assert labels(select_seats(layout, ["KA-3", "KA-6"], 2)) == ["KA-3", "KA-6"]
+
+
+def test_nearby_alternates_right_and_left_across_rows():
+    # KA-4 is sold: the next seat to the right of KA-3 is KA-5, in the next row.
+    layout = [coach("KA", "11101111")]
+    assert labels(select_seats(layout, ["KA-3"], 3)) == ["KA-2", "KA-3", "KA-5"]
+
+
+def test_sold_desired_seat_falls_back_to_any_seat():
+    layout = [coach("KA", "01100000"), coach("KHA", "11110000", first_ticket_id=2000)]
+    assert labels(select_seats(layout, ["KA-1"], 3)) == ["KA-2", "KA-3", "KHA-1"]
+
+
+def test_middle_block_is_consecutive_around_the_middle():
+    layout = [coach("KA", "1" * 16)]
+    assert labels(select_seats(layout, [], 2)) == ["KA-7", "KA-8"]
+
+
+def test_middle_out_without_a_block():
+    layout = [coach("KA", "10" * 8)]
+    assert labels(select_seats(layout, [], 2)) == ["KA-7", "KA-9"]
+
+
+def test_no_seats():
+    assert select_seats([coach("KA", "0000")], [], 2) == {}
+    assert select_seats([coach("KA", "1111")], ["KA-1"], 0) == {}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_exact_matches_agree_with_legacy(legacy, seed):
+    rng = random.Random(seed)
+    layout = make_seat_layout(coaches=6, rows=10, occupancy=0.5, seed=seed)
+    desired = rng.sample(available_labels(layout), rng.randint(1, 4))
+    assert select_seats(layout, desired, len(desired)) == legacy["find_selected_seats"](layout, desired, len(desired))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_fill_agrees_with_legacy(legacy, seed):
+    layout = make_seat_layout(coaches=4, rows=5, occupancy=0.8, seed=seed)
+    max_seat = random.Random(seed).randint(1, 4)
+    assert select_seats(layout, ["ZZ-1"], max_seat) == legacy["find_remaining_seats"](layout, {}, max_seat)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_middle_block_is_one_of_the_legacy_blocks(legacy, seed):
+    layout = make_seat_layout(coaches=4, rows=10, occupancy=0.5, seed=seed)
+    max_seat = random.Random(seed).randint(2, 4)
+    selected = select_seats(layout, [], max_seat)
+    numbers = sorted(map(seat_no, selected.values()))
+    if len({label.split("-")[0] for label in selected.values()}) == 1 and numbers[-1] - numbers[0] == max_seat - 1:
+        blocks = legacy["select_block_seats"](legacy["find_seat_blocks"](layout, max_seat), max_seat)
+        assert selected.items() <= blocks.items()
+
+
+@pytest.mark.parametrize("availability", ["10" * 8, "1001" * 5, "0110100101101001"])
+def test_middle_out_agrees_with_legacy_on_one_coach(legacy, availability):
+    layout = [coach("KA", availability)]
+    expected = legacy["select_block_seats"](legacy["find_seat_blocks"](layout, 3), 3)
+    assert select_seats(layout, [], 3) == expected
@@ -0,0 +1,122 @@
+import json, time
+from urllib.parse import urlsplit
+from contextlib import contextmanager
+from contextvars import ContextVar
+import aiohttp
+from colorama import Fore
+
+
+_current_stage = ContextVar("current_stage", default=None)
+MAX_REQUESTS_PER_STAGE = 50
+
+
+class BookingTimeline:
+    """
+    Records how long each booking stage and each HTTP request takes.
+
+    Stages are opened with `stage()`; requests made by ShohozClient while a
+    stage is open are attached to it with a DNS / connect (TCP+TLS) / TTFB /
+    total breakdown taken from aiohttp tracing. A request that reuses a
+    keep-alive connection has no DNS or connect time. Polling stages can make
+    thousands of requests, so only the first MAX_REQUESTS_PER_STAGE are kept
+    per stage; `request_count` still counts all of them.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.stages = []
+
+    def _offset_ms(self, moment):
+        return round((moment - self.origin) * 1000, 3)
+
+    @contextmanager
+    def stage(self, name, **details):
+        """Time a booking stage; `details` are stored with it (e.g. ticket=...)."""
+        record = {"stage": name, **details, "start_ms": self._offset_ms(time.perf_counter()), "request_count": 0, "requests": []}
+        self.stages.append(record)
+        token = _current_stage.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            _current_stage.reset(token)
+
+    def request_started(self, method, url):
+        stage = _current_stage.get()
+        record = {
+            "method": method,
+            "path": urlsplit(str(url)).path,
+            "stage": stage["stage"] if stage else None,
+            "start_ms": self._offset_ms(time.perf_counter()),
+            "_start": time.perf_counter(),
+        }
+        if stage is not None:
+            stage["request_count"] += 1
+            if len(stage["requests"]) < MAX_REQUESTS_PER_STAGE:
+                stage["requests"].append(record)
+        return record
+
+    def request_finished(self, record, status=None, error=None):
+        record["total_ms"] = round((time.perf_counter() - record.pop("_start")) * 1000, 3)
+        record["status"] = status
+        if error is not None:
+            record["error"] = error
+
+    def trace_config(self):
+        """aiohttp TraceConfig that fills in DNS, connect and TTFB for recorded requests."""
+
+        def mark(key):
+            async def handler(session, ctx, params):
+                record = ctx.trace_request_ctx
+                if record is not None:
+                    record[key] = time.perf_counter()
+            return handler
+
+        def span(name, start_key):
+            async def handler(session, ctx, params):
+                record = ctx.trace_request_ctx
+                if record is not None and start_key in record:
+                    record[name] = round((time.perf_counter() - record.pop(start_key)) * 1000, 3)
+            return handler
+
+        async def on_reuse(session, ctx, params):
+            if ctx.trace_request_ctx is not None:
+                ctx.trace_request_ctx["reused_connection"] = True
+
+        async def on_request_end(session, ctx, params):
+            record = ctx.trace_request_ctx
+            if record is not None and "_start" in record:
+                record["ttfb_ms"] = round((time.perf_counter() - record["_start"]) * 1000, 3)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_dns_resolvehost_start.append(mark("_dns"))
+        trace_config.on_dns_resolvehost_end.append(span("dns_ms", "_dns"))
+        trace_config.on_connection_create_start.append(mark("_connect"))
+        trace_config.on_connection_create_end.append(span("connect_ms", "_connect"))
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        trace_config.on_request_end.append(on_request_end)
+        return trace_config
+
+    def to_dict(self):
+        return {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "stages": self.stages,
+        }
+
+    def report(self, path="booking_timeline.json"):
+        """Write the timeline as JSON and print a per-stage summary."""
+        data = self.to_dict()
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+        print(f"\n{Fore.CYAN}{'stage':<22}{'start ms':>11}{'took ms':>11}{'reqs':>6}{'dns':>8}{'connect':>9}{'ttfb':>9}")
+        for stage in data["stages"]:
+            requests = stage["requests"]
+            dns = sum(r.get("dns_ms", 0) for r in requests)
+            connect = sum(r.get("connect_ms", 0) for r in requests)
+            ttfb = sum(r.get("ttfb_ms", 0) for r in requests)
+            name = stage["stage"] + (f" {stage['ticket']}" if "ticket" in stage else "")
+            print(f"{name:<22}{stage['start_ms']:>11.1f}{stage.get('duration_ms', 0):>11.1f}{stage['request_count']:>6}"
+                  f"{dns:>8.1f}{connect:>9.1f}{ttfb:>9.1f}")
+        print(f"{Fore.CYAN}Timeline written to {path}")
@@ -0,0 +1,264 @@
+"""
+Record and replay Shohoz API traffic.
+
+Recording: set SHOHOZ_RECORD to a file and every request script.py makes is
+appended to it as one JSON line: timing, method, path, request body and the
+response. Passwords, OTPs, tokens, passenger contact details and payment
+links are redacted before anything is written; auth tokens are replaced by an
+unsigned stand-in that keeps the original expiry, payment links by a
+placeholder URL.
+
+    SHOHOZ_RECORD=traffic.jsonl python script.py
+
+Replay: serve a recording back at its original timing, or scaled by --scale,
+and point the client at it like at mock_server.py:
+
+    python traffic.py replay traffic.jsonl --scale 1.0
+    SHOHOZ_API_BASE=http://127.0.0.1:8080/v1.0/app python script.py
+
+Every run appends a new session to the file; replay serves one session, the
+last one unless --session picks another (0 = the oldest, -2 = the one before
+the last).
+
+Each request is answered with the recording for the same method and path
+whose offset from the start of the session is closest to (but not after)
+the replay's own offset, after sleeping for the recorded server latency.
+The seat layout therefore opens at the same point of the session however
+fast the client polls. Compare two runs with their timelines:
+
+    python traffic.py compare old_timeline.json new_timeline.json
+"""
+import argparse, asyncio, bisect, json, sys, time
+from collections import defaultdict
+from urllib.parse import urlsplit
+import jwt
+from aiohttp import web
+from colorama import Fore, init
+
+
+SECRET_KEYS = {"password", "otp", "token", "mobile_number", "pmobile", "pemail", "pname", "phone_number", "email"}
+REDACTED = "[REDACTED]"
+# One-time payment session links, e.g. the confirm response's redirectUrl.
+PAYMENT_URL_KEYS = {"redirectUrl", "redirect_url", "paymentUrl", "payment_url", "gatewayUrl", "gateway_url"}
+REDACTED_URL = "https://redacted.invalid/payment"
+
+
+def stand_in_token(token):
+    """An unsigned token with placeholder claims and the original token's expiry."""
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        exp = None
+    claims = {"email": "redacted@example.com", "phone_number": "00000000000", "display_name": "Redacted"}
+    if exp:
+        claims["exp"] = exp
+    return jwt.encode(claims, "redacted", algorithm="HS256")
+
+
+def redact(value):
+    """Copy of a decoded JSON value with secret fields replaced."""
+    if isinstance(value, dict):
+        return {key: (stand_in_token(item) if key == "token" and isinstance(item, str)
+                      else REDACTED_URL if key in PAYMENT_URL_KEYS and isinstance(item, str)
+                      else REDACTED if key in SECRET_KEYS or key in PAYMENT_URL_KEYS else redact(item))
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def redact_text(text):
+    try:
+        return json.dumps(redact(json.loads(text)))
+    except ValueError:
+        return text
+
+
+class TrafficRecorder:
+    """
+    Appends every request made through ShohozClient to a JSONL file.
+
+    Args:
+        path (str): The recording file; lines are appended.
+    """
+
+    def __init__(self, path="traffic.jsonl"):
+        self.path = path
+        self.origin = time.perf_counter()
+        self.file = open(path, "a", encoding="utf-8", buffering=1)
+        self._write({"session": time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+    def _write(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+
+    def record(self, method, url, kwargs, started, response=None, error=None):
+        """
+        Log one finished request.
+
+        Args:
+            method (str), url (str): The request line.
+            kwargs (dict): Keyword arguments given to the request (json, params).
+            started (float): time.perf_counter() when the request was sent.
+            response (ApiResponse): The response, if one arrived.
+            error (str): The error, if none did.
+        """
+        finished = time.perf_counter()
+        parts = urlsplit(str(url))
+        entry = {
+            "t": round(started - self.origin, 6),
+            "elapsed_ms": round((finished - started) * 1000, 3),
+            "method": method,
+            "path": parts.path,
+            "query": redact(kwargs.get("params")),
+            "request": redact(kwargs.get("json")),
+        }
+        if response is not None:
+            entry["status"] = response.status
+            entry["content_type"] = response.headers.get("Content-Type", "application/json")
+            entry["body"] = redact_text(response.text)
+        else:
+            entry["error"] = error
+        self._write(entry)
+
+    def close(self):
+        self.file.close()
+
+
+def read_sessions(path):
+    """
+    Split a recording into the sessions appended to it.
+
+    Returns:
+        list: (session start, [exchanges]) per session, oldest first. Offsets
+            of exchanges are relative to the start of their own session.
+    """
+    sessions = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            entry = json.loads(line)
+            if "session" in entry:
+                sessions.append((entry["session"], []))
+            elif "method" in entry and "status" in entry:
+                if not sessions:
+                    sessions.append((None, []))
+                sessions[-1][1].append(entry)
+    return sessions
+
+
+def load_recording(path, session=-1):
+    """
+    Read one session of a recording into {(method, path): [entries sorted by offset]}.
+
+    Args:
+        path (str): The recording file.
+        session (int): Index of the session to load, as for a list; the last by default.
+
+    Raises:
+        IndexError: If the recording has no such session.
+    """
+    exchanges = defaultdict(list)
+    for entry in read_sessions(path)[session][1]:
+        exchanges[(entry["method"], entry["path"])].append(entry)
+    for entries in exchanges.values():
+        entries.sort(key=lambda entry: entry["t"])
+    return exchanges
+
+
+class ReplayServer:
+    """
+    Answers requests from a recording, on the recording's timeline.
+
+    Args:
+        exchanges (dict): Result of load_recording.
+        scale (float): Timing factor; 0.5 replays the session at twice the speed.
+    """
+
+    def __init__(self, exchanges, scale=1.0):
+        self.exchanges = exchanges
+        self.offsets = {key: [entry["t"] for entry in entries] for key, entries in exchanges.items()}
+        self.scale = scale
+        self.origin = None
+        self.served = 0
+
+    def pick(self, method, path):
+        """The recorded exchange to answer with, or None if the path was never recorded."""
+        entries = self.exchanges.get((method, path))
+        if not entries:
+            return None
+        now = time.perf_counter()
+        if self.origin is None:
+            # Line up the first request with the first recorded request.
+            first = min(offsets[0] for offsets in self.offsets.values())
+            self.origin = now - first * self.scale
+        offset = (now - self.origin) / self.scale
+        index = bisect.bisect_right(self.offsets[(method, path)], offset) - 1
+        return entries[max(index, 0)]
+
+    async def handle(self, request):
+        entry = self.pick(request.method, request.path)
+        if entry is None:
+            return web.json_response({"error": {"messages": {"message": "not in recording"}}}, status=404)
+        await asyncio.sleep(entry["elapsed_ms"] / 1000 * self.scale)
+        self.served += 1
+        return web.Response(status=entry["status"], text=entry["body"],
+                            content_type=entry["content_type"].split(";")[0])
+
+    def app(self):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        return app
+
+
+def stage_durations(path):
+    with open(path, encoding="utf-8") as file:
+        stages = json.load(file)["stages"]
+    durations = defaultdict(float)
+    for stage in stages:
+        durations[stage["stage"]] += stage.get("duration_ms", 0)
+    return durations
+
+
+def compare(old_path, new_path):
+    """Print per-stage time of two booking timelines side by side."""
+    old, new = stage_durations(old_path), stage_durations(new_path)
+    print(f"{Fore.CYAN}{'stage':<22}{'old ms':>11}{'new ms':>11}{'change':>10}")
+    for stage in list(dict.fromkeys(list(old) + list(new))):
+        before, after = old.get(stage, 0), new.get(stage, 0)
+        change = f"{(after - before) / before:+.0%}" if before else "-"
+        print(f"{stage:<22}{before:>11.1f}{after:>11.1f}{change:>10}")
+
+
+def main(argv=None):
+    init(autoreset=True)
+    parser = argparse.ArgumentParser(description="Replay recorded Shohoz API traffic, or compare booking timelines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay = commands.add_parser("replay", help="serve a recording")
+    replay.add_argument("recording")
+    replay.add_argument("--host", default="127.0.0.1")
+    replay.add_argument("--port", type=int, default=8080)
+    replay.add_argument("--scale", type=float, default=1.0, help="timing factor (0.5 = twice as fast)")
+    replay.add_argument("--session", type=int, default=-1, help="session of the recording to serve (default: the last)")
+    diff = commands.add_parser("compare", help="compare two booking timeline files")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        compare(args.old, args.new)
+        return 0
+    sessions = read_sessions(args.recording)
+    if not -len(sessions) <= args.session < len(sessions):
+        print(f"{Fore.RED}{args.recording} has {len(sessions)} session(s):")
+        for index, (started, entries) in enumerate(sessions):
+            print(f"{index:>4}  {started or 'unknown start'}  {len(entries)} exchanges")
+        return 1
+    started, _ = sessions[args.session]
+    exchanges = load_recording(args.recording, args.session)
+    print(f"{Fore.CYAN}Replaying session {args.session % len(sessions)} of {len(sessions)} ({started or 'unknown start'}): "
+          f"{sum(map(len, exchanges.values()))} exchanges on {len(exchanges)} endpoints")
+    web.run_app(ReplayServer(exchanges, args.scale).app(), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())